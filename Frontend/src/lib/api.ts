@@ -4,7 +4,7 @@
  */
 
 import axios, { AxiosError, AxiosInstance, AxiosResponse } from 'axios';
-import { ModelInfoResponse, Notification, LogEntry } from '@/types';
+import { ModelInfoResponse, Notification, LogEntry, RiskDistribution } from '@/types';
 
 // Environment detection
 const isProduction = import.meta.env.PROD;
@@ -51,6 +51,16 @@ const SSE_BASE_URL = getSSEUrl();
 // Request timeout in milliseconds (increased for large file scans)
 const REQUEST_TIMEOUT = 300000; // 5 minutes
 
+// Risk levels reported by /threats/distribution
+const EMPTY_RISK_DISTRIBUTION: RiskDistribution = {
+  BENIGN: 0,
+  LOW: 0,
+  MEDIUM: 0,
+  HIGH: 0,
+  CRITICAL: 0,
+};
+const RISK_LEVEL_KEYS: ReadonlySet<string> = new Set(Object.keys(EMPTY_RISK_DISTRIBUTION));
+
 // =====================================================================
 // Type Definitions (matching backend models)
 // =====================================================================
@@ -76,6 +86,11 @@ export interface ThreatListParams {
   offset?: number;
   risk_level?: string;
   source_type?: string;
+  // Keyset cursor (next_cursor of the previous page); use instead of offset
+  before_ts?: string;
+  before_id?: number;
+  // Defaults to true; the list views don't show details, so they skip them
+  include_details?: boolean;
 }
 
 // API Error response (matches backend ErrorResponse model)
@@ -275,9 +290,19 @@ class ApiClient {
   /**
    * Get threat distribution by risk level
    */
-  async getThreatDistribution(): Promise<import('@/types').RiskDistribution> {
+  async getThreatDistribution(): Promise<RiskDistribution> {
     const response = await this.client.get('/threats/distribution');
-    return response.data;
+    // Backend returns one { risk_level, count, ... } bucket per level present;
+    // fill every level (absent ones as 0) in a single merge
+    const buckets: Array<{ risk_level: string; count: number }> = response.data;
+    return {
+      ...EMPTY_RISK_DISTRIBUTION,
+      ...Object.fromEntries(
+        buckets
+          .filter((bucket) => RISK_LEVEL_KEYS.has(bucket.risk_level))
+          .map((bucket) => [bucket.risk_level, bucket.count])
+      ),
+    };
   }
 
   /**
@@ -407,6 +432,24 @@ class ApiClient {
       }
     };
     
+    eventSource.addEventListener('log', (event) => {
+      try {
+        onLog(JSON.parse((event as MessageEvent).data) as LogEntry);
+      } catch (error) {
+        console.error('Failed to parse log entry:', error);
+      }
+    });
+    
+    // History replay and bursts arrive as one frame holding an array of entries
+    eventSource.addEventListener('log_batch', (event) => {
+      try {
+        const entries = JSON.parse((event as MessageEvent).data) as LogEntry[];
+        entries.forEach(onLog);
+      } catch (error) {
+        console.error('Failed to parse log batch:', error);
+      }
+    });
+    
     if (onError) {
       eventSource.onerror = onError;
     }
@@ -37,7 +37,7 @@ export default function Dashboard() {
         api.getThreatStats(),
         api.getThreatDistribution().catch(() => null),
         api.getHealth(),
-        api.getThreats({ limit: 5, offset: 0, risk_level: 'HIGH,CRITICAL' }).catch(() => null),
+        api.getThreats({ limit: 5, offset: 0, risk_level: 'HIGH,CRITICAL', include_details: false }).catch(() => null),
       ]);
 
       setStats(statsData);
@@ -34,6 +34,7 @@ export default function Threats() {
         offset: filters.offset,
         risk_level: filters.risk_level,
         source_type: filters.source_type,
+        include_details: false,
       });
 
       setThreats(threatsResponse.threats);
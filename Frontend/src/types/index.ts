@@ -70,11 +70,18 @@ export interface ThreatLog {
   blocked: boolean;
 }
 
+export interface ThreatCursor {
+  before_ts: string;
+  before_id: number;
+}
+
 export interface ThreatListResponse {
   threats: ThreatLog[];
   total: number;
   limit: number;
   offset: number;
+  // Spread into the next getThreats() call; null on the last page
+  next_cursor: ThreatCursor | null;
 }
 
 export interface ThreatStats {
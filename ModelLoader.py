@@ -7,17 +7,22 @@ with the alert system for real-time packet analysis and threat notification.
 """
 
 import os
-import json
+import sys
+import math
 import time
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
 import numpy as np
+import orjson
 import logging
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
 from datetime import datetime
 from enum import Enum
 import threading
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from collections import Counter, deque
 from torch.nn import TransformerEncoder, TransformerEncoderLayer
 
 # Configure logging
@@ -31,15 +36,54 @@ class PositionalEncoding(nn.Module):
         super().__init__()
         pe = torch.zeros(max_len, d_model)
         position = torch.arange(0, max_len, dtype=torch.float).unsqueeze(1)
-        div_term = torch.exp(torch.arange(0, d_model, 2).float() * (-torch.log(torch.tensor(10000.0)) / d_model))
+        div_term = torch.exp(torch.arange(0, d_model, 2, dtype=torch.float) * (-math.log(10000.0) / d_model))
         pe[:, 0::2] = torch.sin(position * div_term)
         pe[:, 1::2] = torch.cos(position * div_term)
         pe = pe.unsqueeze(0)
-        self.register_buffer('pe', pe)
+        # Deterministic, so it is rebuilt on construction rather than stored in checkpoints
+        self.register_buffer('pe', pe, persistent=False)
     
     def forward(self, x: torch.Tensor) -> torch.Tensor:
-        x = x + self.pe[:, :x.size(1)]
-        return x
+        # In-place add avoids allocating a second [batch, seq_len, d_model] activation
+        return x.add_(self.pe[:, :x.size(1)])
+
+class FlashEncoderLayer(TransformerEncoderLayer):
+    """
+    Transformer encoder layer whose self-attention calls F.scaled_dot_product_attention
+    directly, so PyTorch can dispatch to the FlashAttention / memory-efficient kernels
+    instead of materializing the full [seq_len, seq_len] score matrix.
+    Parameter names match TransformerEncoderLayer, so existing checkpoints load unchanged.
+    """
+    
+    def _sa_block(self, x: torch.Tensor, attn_mask: Optional[torch.Tensor],
+                  key_padding_mask: Optional[torch.Tensor], is_causal: bool = False) -> torch.Tensor:
+        if attn_mask is not None or not self.self_attn.batch_first:
+            return super()._sa_block(x, attn_mask, key_padding_mask, is_causal=is_causal)
+        
+        batch_size, seq_len, _ = x.shape
+        attn = self.self_attn
+        
+        # Project and split heads: [batch_size, num_heads, seq_len, head_dim]
+        qkv = F.linear(x, attn.in_proj_weight, attn.in_proj_bias)
+        qkv = qkv.view(batch_size, seq_len, 3, attn.num_heads, attn.head_dim).permute(2, 0, 3, 1, 4)
+        q, k, v = qkv[0], qkv[1], qkv[2]
+        
+        # SDPA boolean masks mark positions that may be attended to; float masks are additive
+        sdpa_mask = None
+        if key_padding_mask is not None:
+            sdpa_mask = key_padding_mask.view(batch_size, 1, 1, seq_len)
+            if sdpa_mask.dtype == torch.bool:
+                sdpa_mask = ~sdpa_mask
+            else:
+                sdpa_mask = sdpa_mask.to(q.dtype)
+        
+        x = F.scaled_dot_product_attention(
+            q, k, v,
+            attn_mask=sdpa_mask,
+            dropout_p=attn.dropout if self.training else 0.0
+        )
+        x = x.transpose(1, 2).reshape(batch_size, seq_len, -1)
+        return self.dropout1(attn.out_proj(x))
 
 class PacketTransformerWithMBP(nn.Module):
     """
@@ -68,8 +112,8 @@ class PacketTransformerWithMBP(nn.Module):
         # Positional encoding
         self.pos_encoder = PositionalEncoding(d_model, max_len)
         
-        # Transformer encoder with 12 layers
-        encoder_layer = TransformerEncoderLayer(
+        # Transformer encoder with 12 layers (SDPA / FlashAttention self-attention)
+        encoder_layer = FlashEncoderLayer(
             d_model=d_model,
             nhead=nhead,
             dim_feedforward=dim_feedforward,
@@ -80,9 +124,11 @@ class PacketTransformerWithMBP(nn.Module):
         self.transformer_encoder = TransformerEncoder(encoder_layer, num_layers)
         
         self.d_model = d_model
+        self.embedding_scale = d_model ** 0.5
         
-        # MLM decoder for pretraining
+        # MLM decoder for pretraining (weight tied to the embedding matrix)
         self.mlm_decoder = nn.Linear(d_model, vocab_size)
+        self.mlm_decoder.weight = self.embedding.weight
         
         # Initialize weights
         self._init_weights()
@@ -90,7 +136,19 @@ class PacketTransformerWithMBP(nn.Module):
     def _init_weights(self):
         """Initialize weights as specified in the paper"""
         nn.init.xavier_uniform_(self.embedding.weight)
-        nn.init.xavier_uniform_(self.mlm_decoder.weight)
+    
+    def drop_mlm_decoder(self):
+        """Remove the MLM head; inference only needs the hidden states"""
+        self.mlm_decoder = None
+    
+    @torch.no_grad()
+    def fuse_embedding_scale(self):
+        """Fold the sqrt(d_model) embedding scale into the embedding weights for inference"""
+        if self.mlm_decoder is not None:
+            raise RuntimeError("Drop the tied MLM decoder before fusing the embedding scale")
+        if self.embedding_scale != 1.0:
+            self.embedding.weight.mul_(self.embedding_scale)
+            self.embedding_scale = 1.0
     
     def forward(self, 
                 src: torch.Tensor, 
@@ -109,7 +167,9 @@ class PacketTransformerWithMBP(nn.Module):
             If mlm=False: Tensor of shape [batch_size, seq_len, d_model] (hidden states)
         """
         # 1. Embedding: [batch_size, seq_len] -> [batch_size, seq_len, d_model]
-        x = self.embedding(src) * (self.d_model ** 0.5)  # Scale embeddings
+        x = self.embedding(src)
+        if self.embedding_scale != 1.0:
+            x = x * self.embedding_scale  # Scale embeddings (folded into weights at inference)
         
         # 2. Positional encoding: Add position information
         x = self.pos_encoder(x)
@@ -120,6 +180,8 @@ class PacketTransformerWithMBP(nn.Module):
         # 4. Output processing
         if mlm:
             # For MLM pretraining: return logits for each token
+            if self.mlm_decoder is None:
+                raise RuntimeError("MLM decoder was removed for inference")
             return self.mlm_decoder(x)  # [batch_size, seq_len, vocab_size]
         else:
             # For downstream tasks: return hidden states
@@ -148,23 +210,29 @@ class MeanPoolingClassifier(nn.Module):
             nn.init.xavier_uniform_(layer.weight)
             nn.init.zeros_(layer.bias)
     
-    def forward(self, x: torch.Tensor) -> torch.Tensor:
+    def forward(self, x: torch.Tensor, padding_mask: Optional[torch.Tensor] = None) -> torch.Tensor:
         """
         Forward pass through the classifier
         
         Args:
             x: Hidden states from transformer [batch_size, seq_len, d_model]
+            padding_mask: Optional padding mask [batch_size, seq_len] (True = padding)
             
         Returns:
             Logits tensor of shape [batch_size, num_classes]
         """
-        # Mean pooling across sequence length
-        x = x.mean(dim=1)  # [batch_size, seq_len, d_model] -> [batch_size, d_model]
+        # Mean pooling across sequence length: [batch_size, seq_len, d_model] -> [batch_size, d_model]
+        if padding_mask is not None:
+            # Average over real bytes only so short packets are not diluted by padding
+            valid = (~padding_mask).unsqueeze(-1).to(x.dtype)
+            x = (x * valid).sum(dim=1) / valid.sum(dim=1).clamp(min=1.0)
+        else:
+            x = x.mean(dim=1)
         
         # Three-layer feedforward with ReLU and dropout
-        x = F.relu(self.fc1(x))
+        x = F.relu(self.fc1(x), inplace=True)
         x = self.dropout(x)
-        x = F.relu(self.fc2(x))
+        x = F.relu(self.fc2(x), inplace=True)
         x = self.dropout(x)
         x = self.fc3(x)
         
@@ -234,16 +302,22 @@ class PacketInspectionTransformerWithPretraining(nn.Module):
         else:
             # Downstream task mode
             hidden_states = self.transformer(packet_bytes, padding_mask, mlm=False)
-            logits = self.classifier(hidden_states)
+            logits = self.classifier(hidden_states, padding_mask)
             return logits
     
     def create_padding_mask(self, packet_bytes: torch.Tensor) -> torch.Tensor:
-        """Create padding mask for variable-length sequences"""
+        """
+        Create padding mask for variable-length sequences.
+        
+        Deprecated for inference: MalwareDetectorService.preprocess_packets builds the mask
+        on the host alongside the tokens. Kept for training, export and graph capture.
+        """
         return packet_bytes == self.pad_token_id
 
 def create_pretrained_model(num_classes: int = 2, 
                            max_packet_length: int = 1500,
-                           dropout: float = 0.1) -> PacketInspectionTransformerWithPretraining:
+                           dropout: float = 0.1,
+                           student: bool = False) -> PacketInspectionTransformerWithPretraining:
     """
     Create the model with pretraining capability exactly as specified in the paper
     
@@ -251,10 +325,24 @@ def create_pretrained_model(num_classes: int = 2,
         num_classes: Number of output classes
         max_packet_length: Maximum sequence length
         dropout: Dropout rate
+        student: If True, create the distilled 6-layer student for CPU deployment
         
     Returns:
         PacketInspectionTransformerWithPretraining model
     """
+    if student:
+        return PacketInspectionTransformerWithPretraining(
+            vocab_size=259,
+            d_model=384,              # Half width
+            nhead=6,                  # Keeps 64-dim heads
+            num_layers=6,             # Half depth (DistilBERT-style)
+            dim_feedforward=1536,
+            max_len=max_packet_length,
+            num_classes=num_classes,
+            dropout=dropout,
+            classifier_dropout=0.5
+        )
+    
     return PacketInspectionTransformerWithPretraining(
         vocab_size=259,           # 0-255 bytes + padding (256) + mask (257) + unknown (258)
         d_model=768,              # Model dimension as in paper
@@ -268,6 +356,57 @@ def create_pretrained_model(num_classes: int = 2,
     )
 
 
+def distillation_loss(student_logits: torch.Tensor,
+                      teacher_logits: torch.Tensor,
+                      labels: torch.Tensor,
+                      temperature: float = 2.0,
+                      alpha: float = 0.5) -> torch.Tensor:
+    """
+    Knowledge distillation loss for training the student model
+    
+    Args:
+        student_logits: Student classification logits [batch_size, num_classes]
+        teacher_logits: Teacher classification logits [batch_size, num_classes]
+        labels: Ground-truth class indices [batch_size]
+        temperature: Softmax temperature applied to both models
+        alpha: Weight of the soft (KL) term; the hard CE term gets 1 - alpha
+        
+    Returns:
+        Scalar loss tensor
+    """
+    soft_loss = F.kl_div(
+        F.log_softmax(student_logits / temperature, dim=-1),
+        F.log_softmax(teacher_logits.detach() / temperature, dim=-1),
+        reduction='batchmean',
+        log_target=True
+    ) * (temperature ** 2)
+    hard_loss = F.cross_entropy(student_logits, labels)
+    return alpha * soft_loss + (1.0 - alpha) * hard_loss
+
+
+def postprocess_binary_logits(logits: torch.Tensor, threshold: float) -> Tuple[torch.Tensor, ...]:
+    """
+    Turn two-class logits into probabilities, argmax/threshold predictions and confidences.
+    
+    For two classes softmax reduces to sigmoid(logit_1 - logit_0), so every output is
+    derived from one difference per sample instead of separate softmax/argmax/max passes.
+    
+    Args:
+        logits: Classification logits [batch_size, 2]
+        threshold: Malicious probability threshold for the optimal predictions
+        
+    Returns:
+        (probabilities [batch_size, 2], default_predictions, optimal_predictions, confidence_scores)
+    """
+    diff = logits[:, 1] - logits[:, 0]
+    malicious_probs = torch.sigmoid(diff)
+    probabilities = torch.stack((1.0 - malicious_probs, malicious_probs), dim=1)
+    default_predictions = (diff > 0).long()
+    optimal_predictions = (malicious_probs > threshold).long()
+    confidence_scores = torch.maximum(malicious_probs, 1.0 - malicious_probs)
+    return probabilities, default_predictions, optimal_predictions, confidence_scores
+
+
 class AlertLevel(Enum):
     """Alert severity levels."""
     LOW = "LOW"
@@ -286,14 +425,28 @@ class AlertType(Enum):
 class AlertSystem:
     """Centralized alert system for malware detection events."""
     
+    # Web alerts file is pruned to the newest MAX_WEB_ALERTS entries every WEB_ALERTS_PRUNE_INTERVAL writes
+    MAX_WEB_ALERTS = 50
+    WEB_ALERTS_PRUNE_INTERVAL = 100
+    
+    # orjson handles numpy arrays/scalars natively; non-string dict keys are stringified
+    JSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+    
     def __init__(self, log_file: str = "malware_alerts.log", 
-                 web_alerts_file: str = "web_alerts.json"):
+                 web_alerts_file: str = "web_alerts.jsonl"):
         """Initialize the alert system."""
         self.log_file = log_file
         self.web_alerts_file = web_alerts_file
         self.alerts_history = []
         self._lock = threading.Lock()
         
+        # Running counters so statistics never rescan the history
+        self._level_counts = Counter()
+        self._type_counts = Counter()
+        self._acknowledged_count = 0
+        self._web_alerts_lock = threading.Lock()
+        self._web_alerts_written = 0
+        
         # Terminal colors
         self.colors = {
             'RED': '\033[91m', 'YELLOW': '\033[93m', 'GREEN': '\033[92m',
@@ -316,6 +469,12 @@ class AlertSystem:
         }
         
         self._setup_logging()
+        
+        # Background writer keeps file I/O off the detection path
+        self._alert_queue = queue.Queue()
+        self._alert_thread = threading.Thread(target=self._alert_worker, name='alert-writer', daemon=True)
+        self._alert_thread.start()
+        
         logger.info("🔔 Alert System initialized")
     
     def _setup_logging(self):
@@ -347,15 +506,52 @@ class AlertSystem:
         
         with self._lock:
             self.alerts_history.append(alert)
+            self._level_counts[alert['level']] += 1
+            self._type_counts[alert['type']] += 1
         
         self._process_alert(alert)
         return alert
     
+    def acknowledge(self, alert_id: str) -> bool:
+        """Mark an alert as acknowledged. Returns False if the alert is unknown."""
+        with self._lock:
+            for alert in reversed(self.alerts_history):
+                if alert['id'] == alert_id:
+                    if not alert['acknowledged']:
+                        alert['acknowledged'] = True
+                        self._acknowledged_count += 1
+                    return True
+        return False
+    
     def _process_alert(self, alert: Dict):
         """Process alert through all notification channels."""
         self._show_terminal_alert(alert)
-        self._log_alert(alert)
-        self._save_web_alert(alert)
+        # File I/O happens on the background writer thread
+        self._alert_queue.put(alert)
+    
+    def _alert_worker(self):
+        """Drain queued alerts and write them to the log and web alerts files in batches."""
+        while True:
+            batch = [self._alert_queue.get()]
+            while True:
+                try:
+                    batch.append(self._alert_queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            try:
+                for alert in batch:
+                    self._log_alert(alert)
+                self._save_web_alerts(batch)
+            except Exception as e:
+                logger.error("Failed to write alerts: %s", e)
+            finally:
+                for _ in batch:
+                    self._alert_queue.task_done()
+    
+    def flush(self):
+        """Block until all queued alerts have been written to disk."""
+        self._alert_queue.join()
     
     def _show_terminal_alert(self, alert: Dict):
         """Display alert in terminal with colors and formatting."""
@@ -390,40 +586,48 @@ class AlertSystem:
         log_message = f"[{alert['level']}] {alert['type']} - {alert['title']}: {alert['message']}"
         self.alert_logger.info(log_message)
         if alert['details']:
-            self.alert_logger.info(f"Alert details: {json.dumps(alert['details'], indent=2)}")
+            details_json = orjson.dumps(alert['details'], default=self._json_default,
+                                        option=self.JSON_OPTIONS | orjson.OPT_INDENT_2).decode()
+            self.alert_logger.info("Alert details: %s", details_json)
     
-    def _make_json_safe(self, obj):
-        """Convert numpy arrays and other non-JSON serializable objects."""
+    @staticmethod
+    def _json_default(obj):
+        """Serialize objects orjson does not handle natively (tensors, plain objects)."""
         if hasattr(obj, 'tolist'):
             return obj.tolist()
-        elif hasattr(obj, '__dict__'):
-            return {key: self._make_json_safe(value) for key, value in obj.__dict__.items()}
-        elif isinstance(obj, dict):
-            return {key: self._make_json_safe(value) for key, value in obj.items()}
-        elif isinstance(obj, (list, tuple)):
-            return [self._make_json_safe(item) for item in obj]
-        else:
-            return obj
+        if hasattr(obj, '__dict__'):
+            return obj.__dict__
+        raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
     
-    def _save_web_alert(self, alert: Dict):
-        """Save alert for web interface consumption."""
-        web_alerts = []
+    def _save_web_alerts(self, alerts: List[Dict]):
+        """Append alerts to the JSON Lines file consumed by the web interface."""
+        options = self.JSON_OPTIONS | orjson.OPT_APPEND_NEWLINE
+        data = b''.join(orjson.dumps(alert, default=self._json_default, option=options)
+                        for alert in alerts)
         
-        if os.path.exists(self.web_alerts_file):
+        with self._web_alerts_lock:
             try:
-                with open(self.web_alerts_file, 'r') as f:
-                    web_alerts = json.load(f)
-            except (json.JSONDecodeError, IOError):
-                web_alerts = []
-        
-        web_alerts.append(self._make_json_safe(alert))
-        web_alerts = web_alerts[-50:]  # Keep only last 50 alerts
-        
+                with open(self.web_alerts_file, 'ab') as f:
+                    f.write(data)
+            except IOError as e:
+                logger.error("Failed to save web alerts: %s", e)
+                return
+            
+            written_before = self._web_alerts_written
+            self._web_alerts_written += len(alerts)
+            if (self._web_alerts_written // self.WEB_ALERTS_PRUNE_INTERVAL
+                    != written_before // self.WEB_ALERTS_PRUNE_INTERVAL):
+                self._prune_web_alerts()
+    
+    def _prune_web_alerts(self):
+        """Rewrite the web alerts file keeping only the most recent alerts."""
         try:
-            with open(self.web_alerts_file, 'w') as f:
-                json.dump(web_alerts, f, indent=2)
+            with open(self.web_alerts_file, 'rb') as f:
+                recent = deque(f, maxlen=self.MAX_WEB_ALERTS)
+            with open(self.web_alerts_file, 'wb') as f:
+                f.writelines(recent)
         except IOError as e:
-            logger.error(f"Failed to save web alerts: {e}")
+            logger.error("Failed to prune web alerts: %s", e)
     
     def malware_detection_alert(self, pcap_file: str, malicious_flows: int, total_flows: int,
                               malicious_packets: int, total_packets: int, threat_level: str) -> Dict:
@@ -476,46 +680,44 @@ class AlertSystem:
                     'acknowledged_count': 0
                 }
             
-            stats = {
+            return {
                 'total_alerts': len(self.alerts_history),
-                'by_level': {},
-                'by_type': {},
-                'acknowledged_count': sum(1 for alert in self.alerts_history if alert.get('acknowledged', False))
+                'by_level': {level.value: self._level_counts[level.value] for level in AlertLevel},
+                'by_type': {alert_type.value: self._type_counts[alert_type.value] for alert_type in AlertType},
+                'acknowledged_count': self._acknowledged_count
             }
-            
-            # Count by level
-            for level in AlertLevel:
-                stats['by_level'][level.value] = sum(
-                    1 for alert in self.alerts_history if alert['level'] == level.value
-                )
-            
-            # Count by type
-            for alert_type in AlertType:
-                stats['by_type'][alert_type.value] = sum(
-                    1 for alert in self.alerts_history if alert['type'] == alert_type.value
-                )
-            
-            return stats
 
 
 class MalwareDetectorService:
     """Production malware detection service using the trained transformer model."""
     
-    def __init__(self, model_path: Optional[str] = None, alert_system: Optional[AlertSystem] = None):
+    # Sequence lengths short packets are grouped into (longer ones run at max_packet_length)
+    LENGTH_BUCKETS = (128, 512)
+    
+    def __init__(self, model_path: Optional[str] = None, alert_system: Optional[AlertSystem] = None,
+                 compile_model: bool = False, student: bool = False):
         """Initialize the malware detection service."""
         self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
         
+        # Mixed precision inference on GPU (BF16 where supported, otherwise FP16)
+        self.use_amp = self.device.type == 'cuda'
+        self.amp_dtype = (torch.bfloat16 if self.use_amp and torch.cuda.is_bf16_supported()
+                          else torch.float16)
+        
         # Default model path in same directory or model subdirectory
         if model_path is None:
             current_dir = os.path.dirname(os.path.abspath(__file__))
+            model_file = 'distilled_student_model.pth' if student else 'finetuned_best_model.pth'
             # Try current directory first, then model subdirectory
-            default_path = os.path.join(current_dir, 'finetuned_best_model.pth')
+            default_path = os.path.join(current_dir, model_file)
             if not os.path.exists(default_path):
-                default_path = os.path.join(current_dir, 'model', 'finetuned_best_model.pth')
+                default_path = os.path.join(current_dir, 'model', model_file)
             model_path = default_path
         
         self.model_path = model_path
         self.alert_system = alert_system
+        self.compile_model = compile_model
+        self.student = student  # Distilled 6-layer model for CPU deployment
         
         # Model configuration
         self.max_packet_length = 1500
@@ -525,8 +727,15 @@ class MalwareDetectorService:
         
         # Class mappings
         self.class_names = {0: 'Benign', 1: 'Malicious'}
-        self.class_colors = {0: '\033[92m', 1: '\033[91m'}
-        self.reset_color = '\033[0m'
+        # Only emit ANSI colors when writing to a terminal (not piped logs)
+        self._use_color = sys.stdout.isatty()
+        if self._use_color:
+            self.class_colors = {0: '\033[92m', 1: '\033[91m'}
+            self.reset_color = '\033[0m'
+        else:
+            self.class_colors = {0: '', 1: ''}
+            self.reset_color = ''
+        self._build_summary_templates()
         
         # Performance stats
         self.model_accuracy = 0.8391  # 83.91%
@@ -534,12 +743,28 @@ class MalwareDetectorService:
         
         # Initialize model
         self.model = None
+        self.compiled_model = None  # torch.compile'd forward, falls back to self.model on failure
+        self.use_cuda_graphs = False  # Manual CUDA graph replay when torch.compile is not used
+        self._cuda_graphs = {}  # (batch_size, seq_len) -> (graph, static_input, static_mask, static_logits)
+        self.ort_session = None  # Optional ONNX Runtime session (see load_onnx_session)
         self._load_model()
         
-        logger.info(f"✅ Malware Detection Service initialized")
-        logger.info(f"📱 Device: {self.device}")
-        logger.info(f"🎯 Optimal threshold: {self.optimal_threshold}")
-        logger.info(f"📊 Model accuracy: {self.model_accuracy:.1%}")
+        logger.info("✅ Malware Detection Service initialized")
+        logger.info("📱 Device: %s", self.device)
+        if self.use_amp:
+            logger.info("⚡ Mixed precision: %s", self.amp_dtype)
+        logger.info("🎯 Optimal threshold: %s", self.optimal_threshold)
+        logger.info("📊 Model accuracy: %.1f%%", self.model_accuracy * 100)
+    
+    def _load_checkpoint(self) -> Dict:
+        """Memory-map the checkpoint, falling back to a full unpickle for legacy files."""
+        try:
+            return torch.load(self.model_path, map_location='cpu', mmap=True, weights_only=True)
+        except Exception as e:
+            # Old (non-zip) checkpoints can't be mmap'd, and extra metadata may need full
+            # unpickling (weights_only=False to handle PyTorch 2.6 security changes)
+            logger.debug("Fast checkpoint load failed (%s), retrying with full unpickling", e)
+            return torch.load(self.model_path, map_location='cpu', weights_only=False)
     
     def _load_model(self):
         """Load the trained model from checkpoint."""
@@ -547,125 +772,373 @@ class MalwareDetectorService:
             # Create model architecture
             self.model = create_pretrained_model(
                 num_classes=self.num_classes, 
-                max_packet_length=self.max_packet_length
+                max_packet_length=self.max_packet_length,
+                student=self.student
             )
             
+            # Inference never uses the MLM head; dropping it also keeps a stale
+            # (untied) decoder weight in older checkpoints from overwriting the embedding
+            self.model.transformer.drop_mlm_decoder()
+            
             # Try to load the model if it exists
             if os.path.exists(self.model_path):
-                # Load checkpoint with weights_only=False to handle PyTorch 2.6 security changes
                 try:
-                    checkpoint = torch.load(self.model_path, map_location='cpu', weights_only=False)
-                    self.model.load_state_dict(checkpoint['model_state_dict'])
-                    logger.info(f"📋 Model loaded from {self.model_path}")
+                    checkpoint = self._load_checkpoint()
+                    # Older checkpoints also carry the (now non-persistent) positional encoding table
+                    state_dict = {
+                        k: v for k, v in checkpoint['model_state_dict'].items()
+                        if not k.startswith('transformer.mlm_decoder.') and k != 'transformer.pos_encoder.pe'
+                    }
+                    # assign=True adopts the (memory-mapped) checkpoint tensors instead of copying them
+                    self.model.load_state_dict(state_dict, assign=True)
+                    logger.info("📋 Model loaded from %s", self.model_path)
                 except Exception as e:
-                    logger.warning(f"⚠️ Could not load model weights: {e}")
+                    # The student has no usable fallback: random weights would serve random verdicts
+                    if self.student:
+                        raise
+                    logger.warning("⚠️ Could not load model weights: %s", e)
                     logger.info("📋 Using randomly initialized model")
+            elif self.student:
+                raise FileNotFoundError(f"Distilled student model not found: {self.model_path}")
             else:
-                logger.warning(f"⚠️ Model file not found: {self.model_path}")
+                logger.warning("⚠️ Model file not found: %s", self.model_path)
                 logger.info("📋 Using randomly initialized model")
             
+            # Fold embedding scaling into the weights (must happen after loading the checkpoint)
+            self.model.transformer.fuse_embedding_scale()
+            
             # Move to device and set evaluation mode
             self.model.to(self.device)
             self.model.eval()
             
+            # JIT-compile the forward path (CUDA graphs on GPU via reduce-overhead)
+            if self.compile_model and hasattr(torch, 'compile'):
+                mode = 'reduce-overhead' if self.device.type == 'cuda' else 'default'
+                self.compiled_model = torch.compile(self.model, mode=mode, dynamic=False)
+                logger.info("⚡ Model compiled with torch.compile (mode=%s)", mode)
+            
+            # Without torch.compile, capture CUDA graphs by hand to avoid per-kernel launch overhead
+            self.use_cuda_graphs = self.device.type == 'cuda' and self.compiled_model is None
+            
             # Log model info
             total_params = sum(p.numel() for p in self.model.parameters())
-            logger.info(f"📋 Model initialized: {total_params:,} parameters")
+            logger.info("📋 Model initialized: %s parameters", format(total_params, ","))
             
         except Exception as e:
-            logger.error(f"❌ Failed to initialize model: {e}")
+            logger.error("❌ Failed to initialize model: %s", e)
             raise
     
-    def preprocess_packets(self, packet_payloads: List[bytes]) -> torch.Tensor:
-        """Preprocess packet payloads into model input format."""
-        processed_packets = []
+    def export_onnx(self, onnx_path: Optional[str] = None, quantize: bool = True) -> str:
+        """
+        Export the classifier to ONNX for ONNX Runtime deployment.
         
-        for payload in packet_payloads:
-            # Convert bytes to integers
-            if isinstance(payload, bytes):
-                packet_ints = list(payload)
-            elif isinstance(payload, (list, np.ndarray)):
-                packet_ints = list(payload)
-            else:
-                logger.warning(f"Unexpected payload type: {type(payload)}")
-                packet_ints = []
+        Args:
+            onnx_path: Output path (defaults to the checkpoint path with a .onnx suffix)
+            quantize: Also write an INT8 dynamically quantized copy (requires onnxruntime)
+            
+        Returns:
+            Path of the exported (quantized if requested) model
+        """
+        onnx_path = onnx_path or os.path.splitext(self.model_path)[0] + '.onnx'
+        
+        dummy_bytes = torch.zeros((1, self.max_packet_length), dtype=torch.long, device=self.device)
+        dummy_mask = self.model.create_padding_mask(dummy_bytes)
+        
+        torch.onnx.export(
+            self.model,
+            (dummy_bytes, dummy_mask),
+            onnx_path,
+            input_names=['input', 'mask'],
+            output_names=['logits'],
+            dynamic_axes={'input': {0: 'batch', 1: 'seq'}, 'mask': {0: 'batch', 1: 'seq'},
+                          'logits': {0: 'batch'}},
+            opset_version=17,
+            dynamo=False
+        )
+        logger.info("📦 Model exported to ONNX: %s", onnx_path)
+        
+        if quantize:
+            from onnxruntime.quantization import quantize_dynamic, QuantType
+            
+            quantized_path = os.path.splitext(onnx_path)[0] + '.int8.onnx'
+            quantize_dynamic(onnx_path, quantized_path, weight_type=QuantType.QInt8)
+            logger.info("📦 INT8 quantized model saved: %s", quantized_path)
+            onnx_path = quantized_path
+        
+        return onnx_path
+    
+    def load_onnx_session(self, onnx_path: str):
+        """Run predict_batch through an ONNX Runtime session instead of the PyTorch model."""
+        import onnxruntime as ort
+        
+        available = ort.get_available_providers()
+        providers = [p for p in ('CUDAExecutionProvider', 'CPUExecutionProvider') if p in available]
+        self.ort_session = ort.InferenceSession(onnx_path, providers=providers)
+        logger.info("📋 ONNX Runtime session loaded from %s (%s)", onnx_path, providers[0])
+    
+    def _get_cuda_graph(self, batch_size: int, seq_len: int) -> Tuple:
+        """Capture (once per input shape) a CUDA graph of the classifier forward pass."""
+        key = (batch_size, seq_len)
+        if key not in self._cuda_graphs:
+            static_input = torch.zeros((batch_size, seq_len), dtype=torch.long, device=self.device)
+            static_mask = self.model.create_padding_mask(static_input)
             
-            # Ensure all values are in valid range (0-255)
-            packet_ints = [min(max(int(b), 0), 255) for b in packet_ints]
+            # Warm up on a side stream so lazy initialization is not recorded into the graph
+            side_stream = torch.cuda.Stream()
+            side_stream.wait_stream(torch.cuda.current_stream())
+            with torch.cuda.stream(side_stream):
+                for _ in range(3):
+                    self.model(static_input, static_mask, pretraining=False)
+            torch.cuda.current_stream().wait_stream(side_stream)
             
-            # Pad or truncate to max_packet_length
-            if len(packet_ints) < self.max_packet_length:
-                packet_ints.extend([self.padding_value] * (self.max_packet_length - len(packet_ints)))
-            elif len(packet_ints) > self.max_packet_length:
-                packet_ints = packet_ints[:self.max_packet_length]
-                logger.debug(f"Truncated packet from {len(packet_ints)} to {self.max_packet_length} bytes")
+            graph = torch.cuda.CUDAGraph()
+            with torch.cuda.graph(graph):
+                static_logits = self.model(static_input, static_mask, pretraining=False)
             
-            processed_packets.append(packet_ints)
+            self._cuda_graphs[key] = (graph, static_input, static_mask, static_logits)
+            logger.info("⚡ Captured CUDA graph for batch shape %s", key)
+        
+        return self._cuda_graphs[key]
+    
+    def _run_model(self, batch: torch.Tensor, padding_mask: torch.Tensor) -> torch.Tensor:
+        """Run the classifier forward pass using the fastest available backend."""
+        if self.ort_session is not None:
+            ort_logits = self.ort_session.run(None, {
+                'input': batch.cpu().numpy(),
+                'mask': padding_mask.cpu().numpy()
+            })[0]
+            return torch.from_numpy(ort_logits).to(self.device)
+        
+        if self.compiled_model is not None:
+            try:
+                return self.compiled_model(batch, padding_mask, pretraining=False)
+            except Exception as e:
+                logger.warning("⚠️ Compiled model failed, falling back to eager mode: %s", e)
+                self.compiled_model = None
         
-        return torch.tensor(processed_packets, dtype=torch.long)
+        if self.use_cuda_graphs:
+            try:
+                graph, static_input, static_mask, static_logits = self._get_cuda_graph(*batch.shape)
+                static_input.copy_(batch)
+                static_mask.copy_(padding_mask)
+                graph.replay()
+                return static_logits.clone()
+            except Exception as e:
+                logger.warning("⚠️ CUDA graph capture failed, falling back to eager mode: %s", e)
+                self.use_cuda_graphs = False
+                self._cuda_graphs.clear()
+        
+        return self.model(batch, padding_mask, pretraining=False)
     
-    def predict_batch(self, packet_data: torch.Tensor, batch_size: int = 32) -> Dict:
-        """Predict malware for a batch of packets with memory-efficient processing."""
-        total_samples = len(packet_data)
+    def preprocess_packets(self, packet_payloads: List[bytes],
+                           max_len: Optional[int] = None) -> Tuple[torch.Tensor, torch.Tensor]:
+        """
+        Preprocess packet payloads into model input format, padded/truncated to max_len.
         
-        # Initialize result containers
-        all_logits = []
-        all_probabilities = []
-        all_default_predictions = []
-        all_optimal_predictions = []
-        all_confidence_scores = []
-        all_malicious_probs = []
+        Returns:
+            (tokens, padding_mask) - the mask is built from the same host buffer, so the
+            inference loop never launches a device kernel to derive it
+        """
+        max_len = max_len or self.max_packet_length
         
-        with torch.no_grad():
+        # Single pre-padded buffer (int16 so the padding value 256 fits)
+        processed_packets = np.full(
+            (len(packet_payloads), max_len),
+            self.padding_value,
+            dtype=np.int16
+        )
+
+        for i, payload in enumerate(packet_payloads):
+            # Convert bytes to integers
+            if isinstance(payload, (bytes, bytearray)):
+                # Bytes are already in range (0-255), copy without conversion
+                count = min(len(payload), max_len)
+                packet_ints = np.frombuffer(payload, dtype=np.uint8, count=count)
+            elif isinstance(payload, (list, np.ndarray)):
+                # Ensure all values are in valid range (0-255)
+                packet_ints = np.clip(np.asarray(payload, dtype=np.int64), 0, 255)
+            else:
+                logger.warning("Unexpected payload type: %s", type(payload))
+                continue
+
+            # Truncate to max_len (padding is already in place)
+            if len(payload) > max_len:
+                packet_ints = packet_ints[:max_len]
+                logger.debug("Truncated packet from %s to %s bytes", len(payload), max_len)
+
+            processed_packets[i, :packet_ints.size] = packet_ints
+
+        padding_mask = torch.from_numpy(processed_packets == self.padding_value)
+        return torch.from_numpy(processed_packets).long(), padding_mask
+    
+    def _plan_length_buckets(self, packet_sizes: np.ndarray,
+                             batch_size: int) -> Tuple[np.ndarray, List[Tuple[int, int, int]]]:
+        """Sort packets by length and split them into (start, stop, seq_len) batches per bucket."""
+        order = np.argsort(packet_sizes, kind='stable')
+        sorted_sizes = packet_sizes[order]
+        
+        bounds = [b for b in self.LENGTH_BUCKETS if b < self.max_packet_length]
+        bounds.append(self.max_packet_length)
+        
+        batches = []
+        start = 0
+        for bound in bounds:
+            # Last bucket also takes oversized packets (they get truncated)
+            stop = (len(sorted_sizes) if bound == bounds[-1]
+                    else int(np.searchsorted(sorted_sizes, bound, side='right')))
+            for batch_start in range(start, stop, batch_size):
+                batches.append((batch_start, min(batch_start + batch_size, stop), bound))
+            start = stop
+        
+        return order, batches
+    
+    def _prefetch_batches(self, packet_payloads: List[bytes], batches: List[Tuple[int, int, int]],
+                          depth: int = 2) -> Iterator[Tuple[torch.Tensor, torch.Tensor]]:
+        """Yield preprocessed (tokens, mask) batches built ahead of time by a background thread."""
+        pin_memory = self.device.type == 'cuda'
+        
+        def build(batch: Tuple[int, int, int]) -> Tuple[torch.Tensor, torch.Tensor]:
+            start, stop, seq_len = batch
+            host_batch, host_mask = self.preprocess_packets(packet_payloads[start:stop], max_len=seq_len)
+            # Pinned host memory lets the device copy run asynchronously
+            if pin_memory:
+                return host_batch.pin_memory(), host_mask.pin_memory()
+            return host_batch, host_mask
+        
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix='preprocess') as pool:
+            pending = deque(pool.submit(build, batch) for batch in batches[:depth])
+            for batch in batches[depth:]:
+                yield pending.popleft().result()
+                pending.append(pool.submit(build, batch))
+            while pending:
+                yield pending.popleft().result()
+    
+    def predict_payloads(self, packet_payloads: List[bytes], batch_size: int = 32,
+                         packet_sizes: Optional[np.ndarray] = None) -> Dict:
+        """
+        Preprocess and predict raw payloads, overlapping CPU preprocessing with inference.
+        
+        Packets are bucketed by length so short packets run at a short sequence length
+        instead of being padded to max_packet_length; results keep the input order.
+        """
+        if packet_sizes is None:
+            packet_sizes = np.fromiter((len(p) for p in packet_payloads), dtype=np.int64,
+                                       count=len(packet_payloads))
+        
+        order, batches = self._plan_length_buckets(packet_sizes, batch_size)
+        sorted_payloads = [packet_payloads[i] for i in order]
+        
+        return self._predict_host_batches(
+            self._prefetch_batches(sorted_payloads, batches),
+            len(packet_payloads),
+            batch_size,
+            row_order=order
+        )
+    
+    def predict_batch(self, packet_data: Union[torch.Tensor, Tuple[torch.Tensor, torch.Tensor]],
+                      batch_size: int = 32) -> Dict:
+        """
+        Predict malware for a batch of packets with memory-efficient processing.
+        
+        Args:
+            packet_data: (tokens, padding_mask) as returned by preprocess_packets, or a
+                bare token tensor whose mask is then derived on the host
+            batch_size: Rows per forward pass
+        """
+        if isinstance(packet_data, torch.Tensor):
+            # One host-side pass for the mask instead of a device kernel per batch
+            padding_mask = packet_data == self.padding_value
+        else:
+            packet_data, padding_mask = packet_data
+        host_batches = ((packet_data[i:i + batch_size], padding_mask[i:i + batch_size])
+                        for i in range(0, len(packet_data), batch_size))
+        return self._predict_host_batches(host_batches, len(packet_data), batch_size)
+    
+    def _predict_host_batches(self, host_batches: Iterable[Tuple[torch.Tensor, torch.Tensor]],
+                              total_samples: int,
+                              batch_size: int, row_order: Optional[np.ndarray] = None) -> Dict:
+        """
+        Run the model over host-side batches and collect the results.
+        
+        Args:
+            host_batches: (tokens, padding_mask) batches on the host, in processing order
+            total_samples: Total number of rows across all batches
+            batch_size: Nominal batch size (partial batches are padded to it for fixed shapes)
+            row_order: Original index of each processed row, if the rows were reordered
+        """
+        num_batches = 0
+        
+        # Preallocated host buffer for the logits; pinned so device->host copies can be asynchronous
+        all_logits = torch.empty(
+            (total_samples, self.num_classes),
+            dtype=torch.float32,
+            pin_memory=self.device.type == 'cuda'
+        )
+        
+        # Dedicated stream for host->device copies on GPU
+        copy_stream = torch.cuda.Stream(self.device) if self.device.type == 'cuda' else None
+        
+        with torch.no_grad(), torch.autocast(device_type=self.device.type, dtype=self.amp_dtype,
+                                             enabled=self.use_amp):
             # Process in smaller batches to manage GPU memory
-            for i in range(0, total_samples, batch_size):
-                end_idx = min(i + batch_size, total_samples)
-                batch = packet_data[i:end_idx].to(self.device)
-                
-                # Create padding mask
-                padding_mask = self.model.create_padding_mask(batch)
+            i = 0
+            for host_batch, host_mask in host_batches:
+                num_rows = len(host_batch)
+                end_idx = i + num_rows
+                num_batches += 1
                 
-                # Get model predictions (using pretraining=False for downstream task)
-                raw_logits = self.model(batch, padding_mask, pretraining=False)
-                probabilities = F.softmax(raw_logits, dim=1)
-                
-                # Default predictions (argmax)
-                default_predictions = torch.argmax(raw_logits, dim=1)
-                
-                # Optimal threshold predictions
-                optimal_predictions = (probabilities[:, 1] > self.optimal_threshold).long()
+                if copy_stream is not None:
+                    with torch.cuda.stream(copy_stream):
+                        batch = host_batch.to(self.device, non_blocking=True)
+                        padding_mask = host_mask.to(self.device, non_blocking=True)
+                    torch.cuda.current_stream(self.device).wait_stream(copy_stream)
+                    batch.record_stream(torch.cuda.current_stream(self.device))
+                    padding_mask.record_stream(torch.cuda.current_stream(self.device))
+                else:
+                    batch = host_batch.to(self.device)
+                    padding_mask = host_mask.to(self.device)
                 
-                # Calculate confidence scores
-                confidence_scores = torch.max(probabilities, dim=1)[0]
-                malicious_probs = probabilities[:, 1]
+                # Pad the final partial batch so compiled/captured graphs always see the same shape
+                fixed_shape = self.compiled_model is not None or self.use_cuda_graphs
+                if fixed_shape and num_rows < batch_size:
+                    filler = batch.new_zeros((batch_size - num_rows, batch.size(1)))
+                    batch = torch.cat([batch, filler], dim=0)
+                    padding_mask = torch.cat([padding_mask, filler.bool()], dim=0)
                 
-                # Move to CPU and store
-                all_logits.append(raw_logits.cpu())
-                all_probabilities.append(probabilities.cpu())
-                all_default_predictions.append(default_predictions.cpu())
-                all_optimal_predictions.append(optimal_predictions.cpu())
-                all_confidence_scores.append(confidence_scores.cpu())
-                all_malicious_probs.append(malicious_probs.cpu())
+                # Get model predictions (using pretraining=False for downstream task)
+                # Logits are cast back to FP32 before softmax/thresholding
+                raw_logits = self._run_model(batch, padding_mask)[:num_rows].float()
                 
-                # Clear GPU cache after each batch
-                if torch.cuda.is_available():
-                    torch.cuda.empty_cache()
+                # Single non-blocking copy per batch straight into the output slice
+                all_logits[i:end_idx].copy_(raw_logits, non_blocking=True)
+                i = end_idx
+        
+        # Wait for outstanding device->host copies before reading the buffer
+        if self.device.type == 'cuda':
+            torch.cuda.synchronize(self.device)
+        
+        # Scatter rows back to the caller's order
+        if row_order is not None:
+            all_logits = all_logits[torch.from_numpy(np.argsort(row_order))]
+        
+        # Derive everything else from the logits once, on the host
+        probabilities, default_predictions, optimal_predictions, confidence_scores = \
+            postprocess_binary_logits(all_logits, self.optimal_threshold)
         
-        # Concatenate all results
         return {
-            'raw_logits': torch.cat(all_logits, dim=0).numpy(),
-            'probabilities': torch.cat(all_probabilities, dim=0).numpy(),
-            'default_predictions': torch.cat(all_default_predictions, dim=0).numpy(),
-            'optimal_predictions': torch.cat(all_optimal_predictions, dim=0).numpy(),
-            'confidence_scores': torch.cat(all_confidence_scores, dim=0).numpy(),
-            'malicious_probabilities': torch.cat(all_malicious_probs, dim=0).numpy(),
+            'raw_logits': all_logits.numpy(),
+            'probabilities': probabilities.numpy(),
+            'default_predictions': default_predictions.numpy(),
+            'optimal_predictions': optimal_predictions.numpy(),
+            'confidence_scores': confidence_scores.numpy(),
+            'malicious_probabilities': probabilities[:, 1].numpy(),
             'threshold_used': self.optimal_threshold,
             'batch_size': total_samples,
             'prediction_timestamp': datetime.now().isoformat(),
             'processing_info': {
                 'total_samples': total_samples,
                 'batch_size_used': batch_size,
-                'num_batches': len(all_logits)
+                'num_batches': num_batches
             }
         }
     
@@ -680,6 +1153,13 @@ class MalwareDetectorService:
         else:
             return 0.85  # Higher threshold for large packets
     
+    def get_dynamic_thresholds(self, packet_sizes: np.ndarray) -> np.ndarray:
+        """Vectorized get_dynamic_threshold over an array of packet sizes."""
+        return np.where(
+            packet_sizes <= 100, 0.75,
+            np.where(packet_sizes <= 800, 0.75 + (0.80 - 0.75) * (packet_sizes - 100) / 700, 0.85)
+        )
+    
     def analyze_packets(self, packet_payloads: List[bytes], max_batch_size: int = 16, 
                        pcap_file: str = "unknown") -> Dict:
         """Complete packet analysis pipeline from raw payloads to predictions."""
@@ -692,30 +1172,24 @@ class MalwareDetectorService:
             }
         
         try:
-            # Preprocess packets
-            packet_data = self.preprocess_packets(packet_payloads)
+            packet_sizes = np.fromiter(
+                (len(payload) for payload in packet_payloads),
+                dtype=np.int64,
+                count=len(packet_payloads)
+            )
             
-            # Get predictions
-            predictions = self.predict_batch(packet_data, batch_size=max_batch_size)
+            # Preprocess packets and get predictions (length-bucketed, preprocessing runs
+            # ahead in a background thread)
+            predictions = self.predict_payloads(packet_payloads, batch_size=max_batch_size,
+                                                packet_sizes=packet_sizes)
             
             # Apply dynamic thresholding
-            optimal_preds = []
-            dynamic_thresholds = []
-            
-            for i, payload in enumerate(packet_payloads):
-                packet_size = len(payload)
-                dynamic_threshold = self.get_dynamic_threshold(packet_size)
-                dynamic_thresholds.append(dynamic_threshold)
-                
-                malicious_prob = float(predictions['malicious_probabilities'][i])
-                is_malicious = malicious_prob > dynamic_threshold
-                optimal_preds.append(1 if is_malicious else 0)
-            
-            optimal_preds = np.array(optimal_preds)
+            dynamic_thresholds = self.get_dynamic_thresholds(packet_sizes)
+            optimal_preds = (predictions['malicious_probabilities'] > dynamic_thresholds).astype(np.int64)
             
             # Update predictions with dynamic results
             predictions['optimal_predictions'] = optimal_preds
-            predictions['dynamic_thresholds'] = np.array(dynamic_thresholds)
+            predictions['dynamic_thresholds'] = dynamic_thresholds
             
             # Analyze results
             malicious_count = int(np.sum(optimal_preds))
@@ -761,13 +1235,13 @@ class MalwareDetectorService:
                     'model_accuracy': self.model_accuracy,
                     'base_threshold': self.optimal_threshold,
                     'dynamic_thresholding': True,
-                    'threshold_range': f"{min(predictions['dynamic_thresholds']):.2f}-{max(predictions['dynamic_thresholds']):.2f}",
+                    'threshold_range': f"{dynamic_thresholds.min():.2f}-{dynamic_thresholds.max():.2f}",
                     'device': str(self.device)
                 }
             }
             
         except Exception as e:
-            logger.error(f"❌ Error analyzing packets: {e}")
+            logger.error("❌ Error analyzing packets: %s", e, exc_info=True)
             return {
                 'status': 'error',
                 'message': str(e),
@@ -775,42 +1249,51 @@ class MalwareDetectorService:
                 'total_count': len(packet_payloads)
             }
     
+    def _build_summary_templates(self):
+        """Precompute the terminal summary so formatting is a single str.format call."""
+        benign, malicious, reset = self.class_colors[0], self.class_colors[1], self.reset_color
+        risk_color = "{risk_color}" if self._use_color else ""
+        divider = "=" * 60 + "\n"
+        
+        self._summary_header = "".join([
+            "\n", divider,
+            "🛡️  MALWARE DETECTION ANALYSIS RESULTS\n",
+            divider,
+            "📊 Total Packets Analyzed: {total_packets}\n",
+            benign, "✅ Benign Packets: {benign_packets}", reset, "\n",
+            malicious, "🚨 Malicious Packets: {malicious_packets}", reset, "\n",
+            "📈 Malicious Ratio: {malicious_ratio:.1%}\n",
+            risk_color, "🎯 Risk Level: {risk_level}", reset, "\n"
+        ])
+        self._summary_malware = "".join([
+            "\n", malicious, "🚨 ALERT: MALWARE DETECTED IN TRAFFIC!", reset, "\n",
+            malicious, "⚠️  {malicious_packets} packets flagged as malicious", reset, "\n"
+        ])
+        self._summary_benign = "".join(["\n", benign, "✅ All packets classified as benign", reset, "\n"])
+        self._summary_footer = "".join([
+            "\n📋 Model Info: {accuracy:.1%} accuracy, threshold {threshold}\n",
+            "💻 Device: {device}\n",
+            divider
+        ])
+    
     def format_analysis_summary(self, analysis_results: Dict) -> str:
         """Format analysis results for terminal display."""
         if analysis_results['status'] != 'success':
             return f"❌ Analysis failed: {analysis_results.get('message', 'Unknown error')}"
         
         summary = analysis_results['summary']
-        reset = self.reset_color
-        
-        # Header
-        output = "\n" + "="*60 + "\n"
-        output += "🛡️  MALWARE DETECTION ANALYSIS RESULTS\n"
-        output += "="*60 + "\n"
-        
-        # Summary stats
-        output += f"📊 Total Packets Analyzed: {summary['total_packets']}\n"
-        output += f"{self.class_colors[0]}✅ Benign Packets: {summary['benign_packets']}{reset}\n"
-        output += f"{self.class_colors[1]}🚨 Malicious Packets: {summary['malicious_packets']}{reset}\n"
-        output += f"📈 Malicious Ratio: {summary['malicious_ratio']:.1%}\n"
-        
-        # Risk assessment
-        risk_color = summary['risk_color']
-        output += f"{risk_color}🎯 Risk Level: {summary['risk_level']}{reset}\n"
-        
-        # Alert if malware detected
-        if summary['contains_malware']:
-            output += f"\n{self.class_colors[1]}🚨 ALERT: MALWARE DETECTED IN TRAFFIC!{reset}\n"
-            output += f"{self.class_colors[1]}⚠️  {summary['malicious_packets']} packets flagged as malicious{reset}\n"
-        else:
-            output += f"\n{self.class_colors[0]}✅ All packets classified as benign{reset}\n"
         
-        # Model info
-        output += f"\n📋 Model Info: {self.model_accuracy:.1%} accuracy, threshold {self.optimal_threshold}\n"
-        output += f"💻 Device: {analysis_results['model_info']['device']}\n"
-        output += "="*60 + "\n"
-        
-        return output
+        return "".join([
+            self._summary_header.format(**summary),
+            # Alert if malware detected
+            (self._summary_malware.format(**summary) if summary['contains_malware']
+             else self._summary_benign),
+            self._summary_footer.format(
+                accuracy=self.model_accuracy,
+                threshold=self.optimal_threshold,
+                device=analysis_results['model_info']['device']
+            )
+        ])
 
 
 def main():
@@ -840,6 +1323,7 @@ def main():
     print(service.format_analysis_summary(results))
     
     # Show alert statistics
+    alert_system.flush()
     stats = alert_system.get_alert_statistics()
     print(f"\n📊 Alert Statistics:")
     print(f"Total alerts: {stats['total_alerts']}")
@@ -6,17 +6,25 @@ Provides REST API endpoints for scanning URLs/files and managing threats.
 import os
 import sys
 import time
+import json
 import logging
 import asyncio
 import psutil
 import torch
+import orjson
+from collections import deque
+from itertools import islice
 from datetime import datetime, timezone
 from contextlib import asynccontextmanager
-from typing import Optional
-from fastapi import FastAPI, File, UploadFile, HTTPException, Query, Depends
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, List, Optional
+from fastapi import FastAPI, File, UploadFile, HTTPException, Query, Depends, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.exceptions import RequestValidationError
+from pydantic import TypeAdapter, ValidationError
 from sse_starlette.sse import EventSourceResponse
 import uvicorn
 
@@ -28,7 +36,7 @@ from models import (
     URLScanRequest, FileScanRequest, ThresholdUpdateRequest,
     ScanResult, ThreatListResponse, ThreatStats, ThreatLog, HealthStatus,
     SettingsStatus, ThresholdResponse, ErrorResponse, RiskLevel,
-    EarlyTerminationSettings
+    ScanStatus, SourceType, EarlyTerminationSettings
 )
 from detector import get_detector, StreamingDetector
 from threat_manager import get_threat_manager, ThreatManager
@@ -41,64 +49,194 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson (numpy values and non-string keys supported)."""
+    
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+
 # Global instances
-_detector: Optional[StreamingDetector] = None
-_threat_manager: Optional[ThreatManager] = None
-_database: Optional[ThreatDatabase] = None
 _start_time: float = time.time()
 
+# Process handle for resource probes (created once; psutil caches /proc lookups on it)
+_process = psutil.Process()
+
+# Startup-time model/hardware facts and periodically refreshed resource metrics
+_model_static: dict = {}
+_cached_metrics: dict = {}
+_METRICS_REFRESH_INTERVAL = 2.0
+
+# Risk level strings resolved to enum members once, instead of RiskLevel(value) per response
+_RISK_LEVELS = {level.value: level for level in RiskLevel}
+_SOURCE_TYPES = {source_type.value: source_type for source_type in SourceType}
+_SCAN_STATUSES = {status.value: status for status in ScanStatus}
+
+# Serializes server-built ScanResult models straight to JSON bytes
+_SCAN_RESULT_ADAPTER = TypeAdapter(ScanResult)
+
+# Validates a whole page of threat rows in one pydantic-core call
+_THREAT_LIST_ADAPTER = TypeAdapter(List[ThreatLog])
+
+# Integer fields reported by /threats/stats
+_THREAT_STATS_FIELDS = tuple(ThreatStats.model_fields)
+
 
+@lru_cache(maxsize=1)
 def get_detector_instance() -> StreamingDetector:
     """Get detector singleton."""
-    global _detector
-    if _detector is None:
-        _detector = get_detector()
-    return _detector
+    return get_detector()
 
 
+@lru_cache(maxsize=1)
 def get_threat_manager_instance() -> ThreatManager:
     """Get threat manager singleton."""
-    global _threat_manager
-    if _threat_manager is None:
-        _threat_manager = get_threat_manager()
-    return _threat_manager
+    return get_threat_manager()
 
 
 def get_database_instance() -> ThreatDatabase:
     """Get database singleton."""
-    global _database
-    if _database is None:
-        _database = get_database()
-    return _database
+    # Not lru_cached: get_database already caches, and closes an instance it replaces.
+    # Same path as ThreatManager, so the two never replace each other's instance.
+    return get_database(settings.database_path)
+
+
+# Components bound once by lifespan; endpoints fall back to the getters if unset
+_detector: Optional[StreamingDetector] = None
+_threat_manager: Optional[ThreatManager] = None
+_database: Optional[ThreatDatabase] = None
+
+
+def _compute_model_static(detector: StreamingDetector) -> dict:
+    """Collect model and hardware facts that never change while the server runs."""
+    model_loaded = detector.model is not None
+    static = {
+        "model_loaded": model_loaded,
+        "total_parameters": detector.total_parameters if model_loaded else 0,
+        "trainable_parameters": detector.trainable_parameters if model_loaded else 0,
+        "logical_cores": psutil.cpu_count(logical=True),
+        "cpu_freq": psutil.cpu_freq(),  # Rarely changes; sampled once
+        "gpu": None
+    }
+    static["physical_cores"] = psutil.cpu_count(logical=False) or static["logical_cores"]
+    
+    if torch.cuda.is_available():
+        major, minor = torch.cuda.get_device_capability(0)
+        static["gpu"] = {
+            "device_name": torch.cuda.get_device_name(0),
+            "device_index": torch.cuda.current_device(),
+            "total_memory_gb": torch.cuda.get_device_properties(0).total_memory / (1024**3),
+            "compute_capability": f"{major}.{minor}"
+        }
+    return static
+
+
+def _sample_metrics() -> dict:
+    """Take a non-blocking snapshot of process, system and GPU resource usage."""
+    metrics = {
+        # interval=None compares against the previous call instead of sleeping
+        "cpu_percent": psutil.cpu_percent(interval=None),
+        "process_memory_mb": _process.memory_info().rss / (1024 * 1024),
+        "memory": psutil.virtual_memory(),
+        "swap": psutil.swap_memory(),
+        "gpu_allocated_gb": None,
+        "gpu_reserved_gb": None
+    }
+    if torch.cuda.is_available():
+        metrics["gpu_allocated_gb"] = torch.cuda.memory_allocated(0) / (1024**3)
+        metrics["gpu_reserved_gb"] = torch.cuda.memory_reserved(0) / (1024**3)
+    return metrics
+
+
+def get_model_static(detector: StreamingDetector) -> dict:
+    """Get the cached model/hardware facts, computing them on first use."""
+    global _model_static
+    if not _model_static:
+        _model_static = _compute_model_static(detector)
+    return _model_static
+
+
+def get_cached_metrics() -> dict:
+    """Get the latest resource metrics snapshot, sampling once if none exists yet."""
+    global _cached_metrics
+    if not _cached_metrics:
+        _cached_metrics = _sample_metrics()
+    return _cached_metrics
+
+
+async def _refresh_metrics():
+    """Background task that keeps the resource metrics snapshot fresh."""
+    global _cached_metrics
+    while True:
+        await asyncio.sleep(_METRICS_REFRESH_INTERVAL)
+        try:
+            _cached_metrics = _sample_metrics()
+        except Exception as e:
+            logger.warning("Failed to refresh resource metrics: %s", e)
+
+
+def _configure_torch_threads() -> None:
+    """
+    Split physical cores between uvicorn workers for CPU inference.
+    
+    Each worker process otherwise sizes its intra-op pool to every core,
+    so multi-worker deployments oversubscribe the CPU.
+    """
+    if torch.cuda.is_available():
+        return
+    
+    workers = max(1, int(os.environ.get("WEB_CONCURRENCY", settings.workers)))
+    cores = psutil.cpu_count(logical=False) or os.cpu_count() or 1
+    torch.set_num_threads(max(1, cores // workers))
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass  # Inter-op pool already started; keep the existing size
+    logger.info(
+        "Torch threads: intra-op=%d, inter-op=%d (%d workers)",
+        torch.get_num_threads(), torch.get_num_interop_threads(), workers
+    )
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan handler."""
-    global _start_time
+    global _start_time, _model_static, _cached_metrics, _detector, _threat_manager, _database
     _start_time = time.time()
     
     # Startup
     logger.info("Starting Malware Detection Gateway...")
+    _configure_torch_threads()
     
     # Initialize components
     try:
-        get_detector_instance()
+        detector = _detector = get_detector_instance()
+        detector.event_loop = asyncio.get_running_loop()
+        _model_static = _compute_model_static(detector)
         logger.info("Detector initialized")
+        
+        # Compile + warm up before serving so no request pays the compilation cost
+        if settings.compile_model:
+            await run_in_threadpool(detector.compile_model)
     except Exception as e:
-        logger.error(f"Failed to initialize detector: {e}")
+        logger.error("Failed to initialize detector: %s", e)
     
     try:
-        get_threat_manager_instance()
+        _threat_manager = get_threat_manager_instance()
         logger.info("Threat manager initialized")
     except Exception as e:
-        logger.error(f"Failed to initialize threat manager: {e}")
+        logger.error("Failed to initialize threat manager: %s", e)
     
     try:
-        get_database_instance()
+        _database = get_database_instance()
         logger.info("Database initialized")
     except Exception as e:
-        logger.error(f"Failed to initialize database: {e}")
+        logger.error("Failed to initialize database: %s", e)
+    
+    # Prime the CPU percent baseline and start periodic resource sampling
+    _cached_metrics = _sample_metrics()
+    metrics_task = asyncio.create_task(_refresh_metrics())
+    log_task = _start_log_pipeline()
     
     logger.info("Malware Detection Gateway started successfully")
     
@@ -106,6 +244,14 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("Shutting down Malware Detection Gateway...")
+    metrics_task.cancel()
+    _stop_log_pipeline(log_task)
+    if _detector is not None:
+        _detector.close()
+    # Let the database writer thread commit anything still queued
+    if _database is not None:
+        await run_in_threadpool(_database.flush)
+    _detector = _threat_manager = _database = None
 
 
 # Create FastAPI application
@@ -114,6 +260,7 @@ app = FastAPI(
     description="Production-grade malware detection system using Transformer model with streaming byte-level analysis",
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
     docs_url="/docs",
     redoc_url="/redoc"
 )
@@ -128,6 +275,85 @@ app.add_middleware(
 )
 
 
+class SSEExemptGZipMiddleware:
+    """
+    GZipMiddleware that passes the SSE routes through untouched.
+    
+    Only newer Starlette releases skip text/event-stream on their own; older
+    ones buffer and compress the stream, which stalls live updates.
+    """
+    
+    def __init__(self, app, exempt_paths: frozenset, **gzip_options):
+        self.app = app
+        self.gzip = GZipMiddleware(app, **gzip_options)
+        self.exempt_paths = exempt_paths
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+        else:
+            await self.gzip(scope, receive, send)
+
+
+# Server-Sent Event routes, which must never be buffered for compression
+SSE_PATHS = frozenset({"/notifications/stream", "/logs/stream"})
+
+# Compress larger responses (threat listings, model info)
+app.add_middleware(SSEExemptGZipMiddleware, exempt_paths=SSE_PATHS, minimum_size=1024, compresslevel=5)
+
+# Allowance for the multipart envelope around an uploaded file
+MULTIPART_OVERHEAD_BYTES = 16 * 1024
+
+# Block size for reading uploads back from the spooled temporary file
+UPLOAD_READ_SIZE = 64 * 1024
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Reject file uploads whose declared Content-Length is already too large.
+    
+    Runs before the multipart body is parsed, so oversized uploads are refused
+    without being read. Requests without a Content-Length (chunked) still hit
+    the streaming size check in scan_file. Every other route passes straight
+    through, without the per-request overhead of BaseHTTPMiddleware.
+    """
+    
+    def __init__(self, app, path: str, max_body_size: int):
+        self.app = app
+        self.path = path
+        self.max_body_size = max_body_size
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] != self.path:
+            await self.app(scope, receive, send)
+            return
+        
+        content_length = 0
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                try:
+                    content_length = int(value)
+                except ValueError:
+                    pass
+                break
+        
+        if content_length > self.max_body_size:
+            response = ORJSONResponse(
+                status_code=413,
+                content={"detail": f"File size exceeds maximum allowed ({settings.max_file_size} bytes)"}
+            )
+            await response(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
+
+
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    path="/scan/file",
+    max_body_size=settings.max_file_size + MULTIPART_OVERHEAD_BYTES
+)
+
+
 # =====================================================================
 # Exception Handlers
 # =====================================================================
@@ -143,7 +369,7 @@ async def validation_exception_handler(request, exc):
             "type": error["type"]
         })
     
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=422,
         content={
             "error": "VALIDATION_ERROR",
@@ -156,8 +382,8 @@ async def validation_exception_handler(request, exc):
 @app.exception_handler(Exception)
 async def general_exception_handler(request, exc):
     """Handle general exceptions."""
-    logger.error(f"Unhandled exception: {exc}", exc_info=True)
-    return JSONResponse(
+    logger.error("Unhandled exception: %s", exc, exc_info=True)
+    return ORJSONResponse(
         status_code=500,
         content={
             "error": "INTERNAL_ERROR",
@@ -177,12 +403,11 @@ async def health_check():
     
     Returns system status including model, database, and resource metrics.
     """
-    detector = get_detector_instance()
-    db = get_database_instance()
+    detector = _detector or get_detector_instance()
+    db = _database or get_database_instance()
     
-    # Calculate memory usage
-    process = psutil.Process()
-    memory_mb = process.memory_info().rss / (1024 * 1024)
+    # Memory usage from the background-refreshed snapshot
+    memory_mb = get_cached_metrics()["process_memory_mb"]
     
     # Determine overall status
     model_loaded = detector.model is not None
@@ -196,7 +421,7 @@ async def health_check():
             "loaded": model_loaded,
             "model_path": settings.model_path,
             "device": str(detector.device),
-            "parameters": sum(p.numel() for p in detector.model.parameters()) if model_loaded else None,
+            "parameters": get_model_static(detector)["total_parameters"] if model_loaded else None,
             "vocab_size": settings.vocab_size,
             "d_model": settings.d_model,
             "num_layers": settings.num_layers
@@ -220,29 +445,22 @@ async def get_model_info():
     """
     Get detailed model information including device, cores, and memory.
     """
-    detector = get_detector_instance()
-    
-    # Get CPU info
-    cpu_count = psutil.cpu_count(logical=True)
-    cpu_count_physical = psutil.cpu_count(logical=False) or cpu_count
-    cpu_freq = psutil.cpu_freq()
-    cpu_percent = psutil.cpu_percent(interval=0.1)
+    detector = _detector or get_detector_instance()
+    static = get_model_static(detector)
+    metrics = get_cached_metrics()
     
-    # Get memory info
-    memory = psutil.virtual_memory()
-    swap = psutil.swap_memory()
+    # Memory info (sampled in the background)
+    memory = metrics["memory"]
+    swap = metrics["swap"]
     
     # Get GPU info if available
     gpu_info = None
-    if torch.cuda.is_available():
+    if static["gpu"] is not None:
         gpu_info = {
             "available": True,
-            "device_name": torch.cuda.get_device_name(0),
-            "device_index": torch.cuda.current_device(),
-            "total_memory_gb": torch.cuda.get_device_properties(0).total_memory / (1024**3),
-            "allocated_memory_gb": torch.cuda.memory_allocated(0) / (1024**3),
-            "cached_memory_gb": torch.cuda.memory_reserved(0) / (1024**3),
-            "compute_capability": f"{torch.cuda.get_device_capability(0)[0]}.{torch.cuda.get_device_capability(0)[1]}",
+            **static["gpu"],
+            "allocated_memory_gb": metrics["gpu_allocated_gb"],
+            "cached_memory_gb": metrics["gpu_reserved_gb"],
             "force_gpu_enabled": settings.force_gpu
         }
     else:
@@ -256,19 +474,19 @@ async def get_model_info():
             "force_gpu_enabled": settings.force_gpu
         }
     
-    # Model parameters
+    # Model parameters (counted once at startup)
     model_loaded = detector.model is not None
-    total_params = sum(p.numel() for p in detector.model.parameters()) if model_loaded else 0
-    trainable_params = sum(p.numel() for p in detector.model.parameters() if p.requires_grad) if model_loaded else 0
+    total_params = static["total_parameters"] if model_loaded else 0
+    trainable_params = static["trainable_parameters"] if model_loaded else 0
     
     return {
         "device": str(detector.device),
-        "device_type": "GPU" if torch.cuda.is_available() else "CPU",
+        "device_type": "GPU" if static["gpu"] is not None else "CPU",
         "cpu": {
-            "logical_cores": cpu_count,
-            "physical_cores": cpu_count_physical,
-            "frequency_mhz": cpu_freq.current if cpu_freq else None,
-            "cpu_percent": cpu_percent
+            "logical_cores": static["logical_cores"],
+            "physical_cores": static["physical_cores"],
+            "frequency_mhz": static["cpu_freq"].current if static["cpu_freq"] else None,
+            "cpu_percent": metrics["cpu_percent"]
         },
         "memory": {
             "total_gb": round(memory.total / (1024**3), 2),
@@ -300,56 +518,206 @@ async def get_model_info():
 # Notification System (Server-Sent Events)
 # =====================================================================
 
-# Notification queue for SSE
-_notification_queue: Optional[asyncio.Queue] = None
-
-# Log queue for live log streaming
-_log_queue: Optional[asyncio.Queue] = None
-_log_buffer: list = []
+# One bounded queue per connected notification stream
+_notification_subscribers: set = set()
+# Queued to a subscriber that was evicted for falling behind
+_STREAM_CLOSED = object()
+# Keep-alive comment interval for SSE connections (sent by sse-starlette)
+_SSE_PING_SECONDS = 30
+# Keep proxies from caching, buffering or re-encoding event streams
+_SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",
+    "Content-Encoding": "identity",
+}
+_MAX_SUBSCRIBER_QUEUE = 100
+
+# One bounded queue per connected log stream
+_log_subscribers: set = set()
+_MAX_LOG_SUBSCRIBER_QUEUE = 256
+_LOG_BATCH_SIZE = 64
 _MAX_LOG_BUFFER = 1000
+_log_buffer: deque = deque(maxlen=_MAX_LOG_BUFFER)
+# Serialized /logs body; reset whenever a new entry reaches the buffer
+_logs_snapshot: Optional[bytes] = None
+
+# Bounded intake fed by AppLogHandler from any thread, drained by one consumer task
+_log_loop: Optional[asyncio.AbstractEventLoop] = None
+_log_intake: Optional[asyncio.Queue] = None
+_MAX_LOG_INTAKE = 4096
+
 
+def _broadcast(subscribers: set, item) -> None:
+    """
+    Push an item to every subscriber queue without awaiting.
+    
+    A subscriber whose queue is full has stopped reading; it is evicted so it
+    no longer costs a failed put per event, and its backlog is replaced with a
+    close marker that ends the stream (EventSource clients reconnect on their own).
+    """
+    stalled = []
+    for queue in subscribers:
+        try:
+            queue.put_nowait(item)
+        except asyncio.QueueFull:
+            stalled.append(queue)
+    for queue in stalled:
+        subscribers.discard(queue)
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(_STREAM_CLOSED)
 
-def get_log_queue() -> asyncio.Queue:
-    """Get or create the log queue."""
-    global _log_queue
-    if _log_queue is None:
-        _log_queue = asyncio.Queue()
-    return _log_queue
 
+def _recent_logs(count: int) -> list:
+    """Snapshot the newest count entries of the log buffer."""
+    return list(islice(_log_buffer, max(0, len(_log_buffer) - count), None))
 
-async def enqueue_log(level: str, message: str, source: str = "backend"):
-    """Add a log entry to the queue for streaming."""
-    log_entry = {
-        "timestamp": datetime.now(timezone.utc).isoformat(),
+
+# (whole second, ISO-8601 prefix) of the last formatted timestamp
+_timestamp_cache: tuple = (None, "")
+
+
+def _format_timestamp(created: float) -> str:
+    """
+    Format a POSIX timestamp as UTC ISO-8601 with microseconds.
+    
+    The date/time prefix only changes once per second, so it is cached and
+    only the microsecond suffix is formatted per call.
+    """
+    global _timestamp_cache
+    second = int(created)
+    cached_second, prefix = _timestamp_cache
+    if second != cached_second:
+        prefix = datetime.fromtimestamp(second, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+        _timestamp_cache = (second, prefix)
+    microsecond = min(round((created - second) * 1_000_000), 999_999)
+    return f"{prefix}.{microsecond:06d}+00:00"
+
+
+def _make_log_entry(level: str, message: str, source: str, created: Optional[float] = None) -> dict:
+    """Build a log entry; created is a POSIX timestamp (defaults to now)."""
+    return {
+        "timestamp": _format_timestamp(created if created is not None else time.time()),
         "level": level.upper(),
         "message": message,
         "source": source
     }
-    
-    # Add to buffer for new connections
-    global _log_buffer
-    _log_buffer.append(log_entry)
-    if len(_log_buffer) > _MAX_LOG_BUFFER:
-        _log_buffer = _log_buffer[-_MAX_LOG_BUFFER:]
-    
-    # Enqueue for streaming
-    queue = get_log_queue()
+
+
+def _publish_log(log_entry: dict) -> None:
+    """Hand a log entry to the consumer task; must run on the event loop thread."""
+    if _log_intake is None:
+        return
     try:
-        await queue.put(log_entry)
+        _log_intake.put_nowait(log_entry)
     except asyncio.QueueFull:
-        pass  # Queue is full, skip this log
+        pass  # Intake is full, drop this log
+
+
+async def enqueue_log(level: str, message: str, source: str = "backend"):
+    """Add a log entry to the queue for streaming."""
+    _publish_log(_make_log_entry(level, message, source))
+
+
+async def _consume_logs():
+    """Move log entries from the intake into the history buffer and every log stream."""
+    global _logs_snapshot
+    while True:
+        log_entry = await _log_intake.get()
+        
+        # Add to buffer for new connections (deque drops the oldest entry itself)
+        _log_buffer.append(log_entry)
+        _logs_snapshot = None
+        
+        if not _log_subscribers:
+            continue
+        
+        # Serialize once for all subscribers rather than once per stream
+        encoded = orjson.dumps(log_entry).decode()
+        _broadcast(_log_subscribers, encoded)
+
+
+def _start_log_pipeline() -> asyncio.Task:
+    """Bind log capture to the running loop and start the consumer task."""
+    global _log_loop, _log_intake
+    _log_intake = asyncio.Queue(maxsize=_MAX_LOG_INTAKE)
+    _log_loop = asyncio.get_running_loop()
+    return asyncio.create_task(_consume_logs())
+
+
+def _stop_log_pipeline(task: asyncio.Task) -> None:
+    """Detach log capture from the loop and cancel the consumer task."""
+    global _log_loop
+    _log_loop = None
+    # The stream is going away; hand any unreported drop count to the other log handlers
+    dropped = _log_handler.take_dropped()
+    if dropped:
+        logger.warning("Live log rate limit: dropped %d records", dropped)
+    task.cancel()
 
 
 # Custom log handler to capture logs
 class AppLogHandler(logging.Handler):
+    """
+    Forward log records to the live log stream.
+    
+    Records below WARNING pass through a token bucket (rate per second, burst
+    of the same size) so a component logging in a tight loop cannot flood the
+    event loop and SSE clients; dropped records are reported as one summary
+    entry by a timer DROP_REPORT_INTERVAL seconds after the first drop, so a
+    burst followed by silence is still reported.
+    """
+    
+    # Seconds between the first dropped record and its summary entry
+    DROP_REPORT_INTERVAL = 1.0
+    
+    def __init__(self, rate: float = 5000.0, level: int = logging.NOTSET):
+        super().__init__(level)
+        self._rate = rate
+        self._tokens = rate
+        self._last = time.monotonic()
+        self._dropped = 0
+        self._report_scheduled = False
+    
     def emit(self, record: logging.LogRecord):
+        loop = _log_loop
+        if loop is None:
+            return  # No running app loop to stream to yet
+        
+        # emit() runs under the handler lock, so the bucket needs no extra locking
+        now = time.monotonic()
+        self._tokens = min(self._rate, self._tokens + (now - self._last) * self._rate)
+        self._last = now
+        if record.levelno < logging.WARNING:
+            if self._tokens < 1.0:
+                self._dropped += 1
+                if not self._report_scheduled:
+                    self._report_scheduled = True
+                    loop.call_soon_threadsafe(loop.call_later, self.DROP_REPORT_INTERVAL, self.flush_dropped)
+                return
+            self._tokens -= 1.0
+        
         try:
-            message = self.format(record)
-            level = record.levelname
-            source = "backend"
-            asyncio.create_task(enqueue_log(level, message, source))
+            log_entry = _make_log_entry(record.levelname, self.format(record), "backend", record.created)
+            # Safe from any thread; no task is created per record
+            loop.call_soon_threadsafe(_publish_log, log_entry)
         except Exception:
             pass
+    
+    def take_dropped(self) -> int:
+        """Return and reset the number of records dropped since the last summary."""
+        with self.lock:
+            self._report_scheduled = False
+            dropped, self._dropped = self._dropped, 0
+        return dropped
+    
+    def flush_dropped(self) -> None:
+        """Publish the count of dropped records, if any; must run on the event loop thread."""
+        dropped = self.take_dropped()
+        if dropped:
+            _publish_log(_make_log_entry(
+                "WARNING", f"Live log rate limit: dropped {dropped} records", "backend"
+            ))
 
 
 # Install log handler
@@ -357,21 +725,17 @@ _log_handler = AppLogHandler()
 logging.getLogger().addHandler(_log_handler)
 
 
-def get_notification_queue() -> asyncio.Queue:
-    """Get or create the notification queue."""
-    global _notification_queue
-    if _notification_queue is None:
-        _notification_queue = asyncio.Queue()
-    return _notification_queue
+def _sse_event(event_type: str, payload) -> dict:
+    """Build an SSE event whose data is serialized with orjson (SSE data must be str)."""
+    return {
+        "event": event_type,
+        "data": orjson.dumps(payload).decode()
+    }
 
 
 async def notify_clients(event_type: str, data: dict):
     """Send notification to all connected clients."""
-    queue = get_notification_queue()
-    await queue.put({
-        "event": event_type,
-        "data": data
-    })
+    _broadcast(_notification_subscribers, _sse_event(event_type, data))
 
 
 @app.get("/notifications/stream", tags=["Notifications"])
@@ -379,6 +743,8 @@ async def notifications_stream():
     """
     Server-Sent Events endpoint for real-time notifications.
     
+    Each connection gets its own queue, so every client receives every event.
+    
     Events:
     - threat_detected: When a threat is detected and blocked
     - scan_completed: When a scan completes
@@ -386,26 +752,24 @@ async def notifications_stream():
     - system_alert: System-level alerts
     """
     async def event_generator():
-        queue = get_notification_queue()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=_MAX_SUBSCRIBER_QUEUE)
+        _notification_subscribers.add(queue)
         try:
             while True:
-                # Wait for notification with timeout
-                try:
-                    notification = await asyncio.wait_for(queue.get(), timeout=30.0)
-                    yield {
-                        "event": notification["event"],
-                        "data": notification["data"]
-                    }
-                except asyncio.TimeoutError:
-                    # Send heartbeat to keep connection alive
-                    yield {
-                        "event": "heartbeat",
-                        "data": {"timestamp": datetime.now(timezone.utc).isoformat()}
-                    }
+                notification = await queue.get()
+                if notification is _STREAM_CLOSED:
+                    break  # Evicted as stalled; let the client reconnect
+                yield notification
         except asyncio.CancelledError:
             pass
+        finally:
+            _notification_subscribers.discard(queue)
     
-    return EventSourceResponse(event_generator())
+    # Keep-alives are ping comments from sse-starlette, so the generator only
+    # wakes for real events
+    return EventSourceResponse(
+        event_generator(), headers=_SSE_HEADERS, ping=_SSE_PING_SECONDS
+    )
 
 
 @app.post("/notifications/test", tags=["Notifications"])
@@ -432,36 +796,44 @@ async def logs_stream():
     
     Events:
     - log: Log entry from backend or frontend
+    - log_batch: JSON array of log entries (history replay and bursts)
     """
     async def event_generator():
-        queue = get_log_queue()
-        
-        # Send buffered logs first (recent history)
-        for log_entry in _log_buffer[-100:]:  # Send last 100 logs
-            yield {
-                "event": "log",
-                "data": log_entry
-            }
+        queue: asyncio.Queue = asyncio.Queue(maxsize=_MAX_LOG_SUBSCRIBER_QUEUE)
+        _log_subscribers.add(queue)
         
         try:
+            # Send buffered logs first (recent history) as a single frame
+            history = _recent_logs(100)  # Send last 100 logs
+            if history:
+                yield _sse_event("log_batch", history)
+            
             while True:
-                # Wait for log with timeout
-                try:
-                    log_entry = await asyncio.wait_for(queue.get(), timeout=30.0)
-                    yield {
-                        "event": "log",
-                        "data": log_entry
-                    }
-                except asyncio.TimeoutError:
-                    # Send heartbeat
-                    yield {
-                        "event": "heartbeat",
-                        "data": {"timestamp": datetime.now(timezone.utc).isoformat()}
-                    }
+                log_entry = await queue.get()
+                if log_entry is _STREAM_CLOSED:
+                    break  # Evicted as stalled; let the client reconnect
+                
+                # Coalesce whatever else is already queued into one frame
+                batch = [log_entry]
+                while len(batch) < _LOG_BATCH_SIZE and not queue.empty():
+                    log_entry = queue.get_nowait()
+                    if log_entry is _STREAM_CLOSED:
+                        return
+                    batch.append(log_entry)
+                
+                # Entries arrive already JSON-encoded (once, by the consumer)
+                if len(batch) == 1:
+                    yield {"event": "log", "data": batch[0]}
+                else:
+                    yield {"event": "log_batch", "data": "[" + ",".join(batch) + "]"}
         except asyncio.CancelledError:
             pass
+        finally:
+            _log_subscribers.discard(queue)
     
-    return EventSourceResponse(event_generator())
+    return EventSourceResponse(
+        event_generator(), headers=_SSE_HEADERS, ping=_SSE_PING_SECONDS
+    )
 
 
 @app.get("/logs", tags=["Logs"])
@@ -471,10 +843,14 @@ async def get_logs():
     
     Returns the most recent log entries from the buffer.
     """
-    return {
-        "logs": _log_buffer[-500:],  # Return last 500 logs
-        "total": len(_log_buffer)
-    }
+    global _logs_snapshot
+    # Polling dashboards reuse the same body until another entry arrives
+    if _logs_snapshot is None:
+        _logs_snapshot = orjson.dumps({
+            "logs": _recent_logs(500),  # Return last 500 logs
+            "total": len(_log_buffer)
+        })
+    return Response(_logs_snapshot, media_type="application/json")
 
 
 @app.post("/logs/test", tags=["Logs"])
@@ -498,22 +874,58 @@ async def receive_frontend_log(data: dict):
     return {"status": "received"}
 
 
+# (settings values, serialized SettingsStatus) last reported by /settings
+_settings_status: tuple = (None, b"")
+
+
 @app.get("/settings", response_model=SettingsStatus, tags=["System"])
 async def get_settings():
     """Get current system settings."""
-    return SettingsStatus(
-        confidence_threshold=settings.confidence_threshold,
-        chunk_size=settings.chunk_size,
-        window_size=settings.window_size,
-        temperature=settings.temperature,
-        risk_levels=settings.risk_levels
+    global _settings_status
+    # Rebuild only when a reported value changed (threshold updates, reloads)
+    key = (
+        settings.confidence_threshold, settings.chunk_size, settings.window_size,
+        settings.temperature, settings.low_risk_threshold, settings.medium_risk_threshold,
+        settings.high_risk_threshold, settings.critical_threshold
     )
+    if _settings_status[0] != key:
+        _settings_status = (key, SettingsStatus(
+            confidence_threshold=settings.confidence_threshold,
+            chunk_size=settings.chunk_size,
+            window_size=settings.window_size,
+            temperature=settings.temperature,
+            risk_levels=settings.risk_levels
+        ).model_dump_json().encode())
+    return Response(_settings_status[1], media_type="application/json")
 
 
 # =====================================================================
 # Scanning Endpoints
 # =====================================================================
 
+def _scan_response(result) -> Response:
+    """
+    Serialize a detector scan result as a ScanResult response.
+    
+    Every field is produced by the detector, so the model is built with
+    model_construct (no validation) and dumped to JSON bytes directly
+    instead of going through the response_model round trip.
+    """
+    scan_result = ScanResult.model_construct(
+        source=result.source,
+        source_type=_SOURCE_TYPES[result.source_type],
+        probability=result.probability,
+        risk_level=_RISK_LEVELS[result.risk_level],
+        bytes_scanned=result.bytes_scanned,
+        blocked=result.blocked,
+        scan_time_ms=result.scan_time_ms,
+        status=_SCAN_STATUSES[result.status],
+        details=result.details,
+        timestamp=datetime.now(timezone.utc)
+    )
+    return Response(_SCAN_RESULT_ADAPTER.dump_json(scan_result), media_type="application/json")
+
+
 @app.post("/scan/url", response_model=ScanResult, tags=["Scanning"])
 async def scan_url(request: URLScanRequest, early_termination: bool = False):
     """
@@ -526,37 +938,45 @@ async def scan_url(request: URLScanRequest, early_termination: bool = False):
     - **block_on_detection**: Block access if threat detected (default: true)
     - **early_termination**: Enable fast block mode - stop at 1KB for high confidence (default: false)
     """
-    detector = get_detector_instance()
+    detector = _detector or get_detector_instance()
     
     url_str = str(request.url)
     
-    logger.info(f"Scanning URL: {url_str} (early_termination={early_termination})")
+    logger.info("Scanning URL: %s (early_termination=%s)", url_str, early_termination)
     
     try:
-        result = detector.scan_url(
+        # Download + inference are blocking; run them off the event loop
+        result = await run_in_threadpool(
+            detector.scan_url,
             url=url_str,
             block_on_detection=request.block_on_detection,
             early_termination=early_termination if early_termination else None
         )
         
-        return ScanResult(
-            source=result.source,
-            source_type=result.source_type,
-            probability=result.probability,
-            risk_level=RiskLevel(result.risk_level),
-            bytes_scanned=result.bytes_scanned,
-            blocked=result.blocked,
-            scan_time_ms=result.scan_time_ms,
-            status=result.status,
-            details=result.details,
-            timestamp=datetime.now(timezone.utc).isoformat()
-        )
+        return _scan_response(result)
     
     except Exception as e:
-        logger.error(f"URL scan error: {e}")
+        logger.error("URL scan error: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail=f"Scan failed: {str(e)}")
 
 
+async def _upload_chunks(file: UploadFile, chunk_size: int, max_size: int) -> AsyncIterator[bytes]:
+    """Yield an upload in chunk_size blocks, aborting with 413 once max_size is exceeded."""
+    # Read the spooled upload in large blocks: each read of a disk-backed
+    # UploadFile is a threadpool hop, so reading chunk_size at a time is costly
+    read_size = max(chunk_size, UPLOAD_READ_SIZE)
+    total = 0
+    while block := await file.read(read_size):
+        total += len(block)
+        if total > max_size:
+            raise HTTPException(
+                status_code=413,
+                detail=f"File size exceeds maximum allowed ({max_size} bytes)"
+            )
+        for start in range(0, len(block), chunk_size):
+            yield block[start:start + chunk_size]
+
+
 @app.post("/scan/file", response_model=ScanResult, tags=["Scanning"])
 async def scan_file(
     file: UploadFile = File(...),
@@ -572,47 +992,26 @@ async def scan_file(
     - **block_on_detection**: Block access if threat detected (default: true)
     - **early_termination**: Enable fast block mode - stop at 1KB for high confidence (default: false)
     """
-    detector = get_detector_instance()
+    detector = _detector or get_detector_instance()
     
     filename = file.filename or "uploaded_file"
-    logger.info(f"Scanning file: {filename} (early_termination={early_termination})")
+    logger.info("Scanning file: %s (early_termination=%s)", filename, early_termination)
     
     try:
-        # Read file content
-        content = await file.read()
-        
-        # Check size limit
-        if len(content) > settings.max_file_size:
-            raise HTTPException(
-                status_code=413,
-                detail=f"File size exceeds maximum allowed ({settings.max_file_size} bytes)"
-            )
-        
-        # Scan
-        result = detector.scan_file(
-            file_data=content,
+        # Scan the upload chunk by chunk; stops reading once a threat is found
+        result = await detector.scan_stream(
+            _upload_chunks(file, settings.chunk_size, settings.max_file_size),
             filename=filename,
             block_on_detection=block_on_detection,
             early_termination=early_termination if early_termination else None
         )
         
-        return ScanResult(
-            source=result.source,
-            source_type=result.source_type,
-            probability=result.probability,
-            risk_level=RiskLevel(result.risk_level),
-            bytes_scanned=result.bytes_scanned,
-            blocked=result.blocked,
-            scan_time_ms=result.scan_time_ms,
-            status=result.status,
-            details=result.details,
-            timestamp=datetime.now(timezone.utc).isoformat()
-        )
+        return _scan_response(result)
     
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"File scan error: {e}")
+        logger.error("File scan error: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail=f"Scan failed: {str(e)}")
 
 
@@ -620,12 +1019,77 @@ async def scan_file(
 # Threat Management Endpoints
 # =====================================================================
 
+def _validate_threat_rows(rows: List[dict]) -> List[ThreatLog]:
+    """
+    Validate a page of database rows as ThreatLog models in bulk.
+    
+    One pydantic-core call covers the whole page. Malformed rows are dropped
+    (and logged) rather than failing the whole page.
+    """
+    try:
+        return _THREAT_LIST_ADAPTER.validate_python(rows)
+    except ValidationError as e:
+        bad_rows = {error["loc"][0] for error in e.errors() if error["loc"]}
+        logger.warning("Skipping %d malformed threat rows", len(bad_rows))
+        return _THREAT_LIST_ADAPTER.validate_python(
+            [row for i, row in enumerate(rows) if i not in bad_rows]
+        )
+
+
+def _details_json(raw: Any) -> bytes:
+    """
+    Stored details as JSON object bytes, or null if they are not a JSON object.
+    
+    BLOBs were written by orjson, so they are valid JSON and used as-is. Legacy
+    TEXT values came from json.dumps (which may emit NaN/Infinity) or elsewhere,
+    so they are parsed and re-dumped rather than trusted.
+    """
+    if isinstance(raw, bytes):
+        return raw if raw.startswith(b"{") else b"null"
+    if isinstance(raw, str):
+        try:
+            raw = json.loads(raw)
+        except ValueError:
+            return b"null"
+    if not isinstance(raw, dict):
+        return b"null"
+    return orjson.dumps(raw, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+
+def _splice_details(threats_json: bytes, threats: List[ThreatLog], raw_details: Dict[int, Any]) -> bytes:
+    """
+    Put each threat's stored details JSON into a page serialized without it.
+    
+    The page is dumped with every details null; those are swapped for the
+    stored bytes, so details are never validated and re-dumped.
+    '"details":null' only occurs as a real key (quotes inside strings are
+    escaped), once per threat and in page order. If the dump ever has a
+    different layout, the page is re-dumped with the details parsed instead.
+    """
+    parts = threats_json.split(b'"details":null')
+    if len(parts) != len(threats) + 1:
+        logger.warning("Unexpected threat page layout; serializing details normally")
+        return _THREAT_LIST_ADAPTER.dump_json([
+            threat.model_copy(update={
+                "details": orjson.loads(_details_json(raw_details.get(threat.id)))
+            })
+            for threat in threats
+        ])
+    chunks = [parts[0]]
+    for threat, part in zip(threats, parts[1:]):
+        chunks.append(b'"details":%b%b' % (_details_json(raw_details.get(threat.id)), part))
+    return b"".join(chunks)
+
+
 @app.get("/threats", response_model=ThreatListResponse, tags=["Threats"])
 async def get_threats(
     limit: int = Query(default=100, ge=1, le=1000),
     offset: int = Query(default=0, ge=0),
     risk_level: Optional[str] = Query(default=None),
-    source_type: Optional[str] = Query(default=None)
+    source_type: Optional[str] = Query(default=None),
+    before_ts: Optional[datetime] = Query(default=None),
+    before_id: Optional[int] = Query(default=None),
+    include_details: bool = Query(default=True)
 ):
     """
     Get threat logs with pagination and filtering.
@@ -634,80 +1098,80 @@ async def get_threats(
     - **offset**: Number of results to skip
     - **risk_level**: Filter by risk level (BENIGN, LOW, MEDIUM, HIGH, CRITICAL)
     - **source_type**: Filter by source type (URL, FILE)
+    - **before_ts** / **before_id**: Keyset cursor from the previous page's
+      next_cursor; seeks directly to the next page instead of skipping offset rows
+    - **include_details**: Include each threat's details (false skips reading them)
     """
-    threat_manager = get_threat_manager_instance()
+    threat_manager = _threat_manager or get_threat_manager_instance()
+    
+    if (before_ts is None) != (before_id is None):
+        raise HTTPException(status_code=422, detail="before_ts and before_id must be given together")
+    before = (before_ts, before_id) if before_ts is not None else None
     
     threats_data = threat_manager.get_threats(
         limit=limit,
         offset=offset,
         risk_level=risk_level,
-        source_type=source_type
+        source_type=source_type,
+        before=before,
+        include_details=include_details,
+        parse_details=False
     )
     
-    total = len(threats_data)
+    # Total across all pages, not just this slice
+    total = threat_manager.count_threats(risk_level=risk_level, source_type=source_type)
     
-    # Convert dictionaries to ThreatLog objects
-    threats = []
-    for threat_dict in threats_data:
-        try:
-            threats.append(ThreatLog(**threat_dict))
-        except Exception as e:
-            logger.warning(f"Failed to convert threat dict to ThreatLog: {e}")
-            # Create a minimal ThreatLog with required fields
-            threats.append(ThreatLog(
-                id=threat_dict.get('id', 0),
-                source=threat_dict.get('source', 'unknown'),
-                source_type=threat_dict.get('source_type', 'FILE'),
-                probability=threat_dict.get('probability', 0.0),
-                bytes_scanned=threat_dict.get('bytes_scanned', 0),
-                risk_level=RiskLevel(threat_dict.get('risk_level', 'BENIGN')),
-                timestamp=threat_dict.get('timestamp', datetime.now(timezone.utc).isoformat()),
-                details=threat_dict.get('details'),
-                blocked=threat_dict.get('blocked', False)
-            ))
+    # Details stay as the stored JSON and are spliced in after serialization
+    raw_details = {}
+    for row in threats_data:
+        details = row.get("details")
+        if details is not None:
+            raw_details[row["id"]] = details
+            row["details"] = None
     
-    return ThreatListResponse(
-        threats=threats,
-        total=total,
-        limit=limit,
-        offset=offset
+    # Serialize the validated page in pydantic-core and return it as-is; a returned
+    # Response skips FastAPI's response_model validate+serialize pass
+    threats = _validate_threat_rows(threats_data)
+    threats_json = _THREAT_LIST_ADAPTER.dump_json(threats)
+    if raw_details:
+        threats_json = _splice_details(threats_json, threats, raw_details)
+    # A full page may have more rows behind it; hand back its last (timestamp, id)
+    next_cursor = None
+    if threats_data and len(threats_data) == limit:
+        last = threats_data[-1]
+        next_cursor = {"before_ts": last["timestamp"], "before_id": last["id"]}
+    body = b'{"threats":%b,"total":%d,"limit":%d,"offset":%d,"next_cursor":%b}' % (
+        threats_json, total, limit, offset, orjson.dumps(next_cursor)
     )
+    return Response(content=body, media_type="application/json")
 
 
 @app.get("/threats/stats", response_model=ThreatStats, tags=["Threats"])
 async def get_threat_stats():
     """Get aggregated threat statistics."""
-    threat_manager = get_threat_manager_instance()
+    threat_manager = _threat_manager or get_threat_manager_instance()
     stats = threat_manager.get_stats()
     
     db_stats = stats.get("database_stats", {})
     
-    # Convert None values to 0 for integer fields
-    def safe_int(value, default=0):
-        return int(value) if value is not None else default
-    
-    return ThreatStats(
-        total=safe_int(db_stats.get("total")),
-        critical=safe_int(db_stats.get("critical")),
-        high=safe_int(db_stats.get("high")),
-        medium=safe_int(db_stats.get("medium")),
-        low=safe_int(db_stats.get("low")),
-        benign=safe_int(db_stats.get("benign")),
-        total_bytes_scanned=safe_int(db_stats.get("total_bytes_scanned"))
-    )
+    # Every ThreatStats field is an int; convert None values to 0 and return the
+    # dict directly instead of building and re-serializing a model
+    return ORJSONResponse({
+        field: int(db_stats.get(field) or 0) for field in _THREAT_STATS_FIELDS
+    })
 
 
 @app.get("/threats/distribution", tags=["Threats"])
 async def get_threat_distribution():
     """Get threat distribution by risk level."""
-    threat_manager = get_threat_manager_instance()
-    return threat_manager.get_risk_distribution()
+    threat_manager = _threat_manager or get_threat_manager_instance()
+    return ORJSONResponse(threat_manager.get_risk_distribution())
 
 
 @app.get("/threats/{threat_id}", tags=["Threats"])
 async def get_threat_by_id(threat_id: int):
     """Get a specific threat by ID."""
-    db = get_database_instance()
+    db = _database or get_database_instance()
     threat = db.get_threat_by_id(threat_id)
     
     if not threat:
@@ -735,14 +1199,14 @@ async def update_threshold(request: ThresholdUpdateRequest):
     settings.confidence_threshold = request.threshold
     
     # Update in detector
-    detector = get_detector_instance()
+    detector = _detector or get_detector_instance()
     detector.set_threshold(request.threshold)
     
     # Update in threat manager
-    threat_manager = get_threat_manager_instance()
+    threat_manager = _threat_manager or get_threat_manager_instance()
     threat_manager.update_threshold(request.threshold)
     
-    logger.info(f"Threshold updated: {old_threshold} -> {request.threshold}")
+    logger.info("Threshold updated: %s -> %s", old_threshold, request.threshold)
     
     return ThresholdResponse(
         old_threshold=old_threshold,
@@ -792,12 +1256,12 @@ async def update_early_termination_settings(request: EarlyTerminationSettings):
     settings.early_termination_min_bytes = request.min_bytes
     
     # Update detector
-    detector = get_detector_instance()
+    detector = _detector or get_detector_instance()
     detector.early_termination_enabled = request.enabled
     detector.early_termination_threshold = request.threshold
     detector.early_termination_min_bytes = request.min_bytes
     
-    logger.info(f"Early termination settings updated: {old_settings} -> {request}")
+    logger.info("Early termination settings updated: %s -> %s", old_settings, request)
     
     return {
         "old_settings": old_settings,
@@ -813,8 +1277,8 @@ async def update_early_termination_settings(request: EarlyTerminationSettings):
 @app.get("/stats", tags=["Statistics"])
 async def get_stats():
     """Get detector and system statistics."""
-    detector = get_detector_instance()
-    threat_manager = get_threat_manager_instance()
+    detector = _detector or get_detector_instance()
+    threat_manager = _threat_manager or get_threat_manager_instance()
     
     return {
         "detector": detector.get_stats(),
@@ -827,23 +1291,27 @@ async def get_stats():
 # Root Endpoint
 # =====================================================================
 
+# Static API description, serialized once at import
+_ROOT_BODY = orjson.dumps({
+    "name": "Real-Time Malware Detection Gateway",
+    "version": "1.0.0",
+    "status": "running",
+    "endpoints": {
+        "docs": "/docs",
+        "health": "/health",
+        "scan_url": "/scan/url",
+        "scan_file": "/scan/file",
+        "threats": "/threats",
+        "threats_stats": "/threats/stats",
+        "settings": "/settings"
+    }
+})
+
+
 @app.get("/", tags=["Root"])
 async def root():
     """Root endpoint with API information."""
-    return {
-        "name": "Real-Time Malware Detection Gateway",
-        "version": "1.0.0",
-        "status": "running",
-        "endpoints": {
-            "docs": "/docs",
-            "health": "/health",
-            "scan_url": "/scan/url",
-            "scan_file": "/scan/file",
-            "threats": "/threats",
-            "threats_stats": "/threats/stats",
-            "settings": "/settings"
-        }
-    }
+    return Response(content=_ROOT_BODY, media_type="application/json")
 
 
 # =====================================================================
@@ -852,10 +1320,23 @@ async def root():
 
 def main():
     """Run the FastAPI application."""
+    if settings.workers > 1 and not settings.debug:
+        # SSE subscribers and the log buffer live in-process, so each worker
+        # only streams its own events
+        logger.warning("Running %d workers: live logs/notifications are per-worker", settings.workers)
+    
     uvicorn.run(
         "app:app",
         host=settings.host,
         port=settings.port,
+        # uvloop/httptools ship with uvicorn[standard]; uvloop is unavailable on Windows
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        # reload only supports a single worker
+        workers=1 if settings.debug else settings.workers,
+        # Longer than nginx's keepalive_timeout (65s) so the proxy closes idle connections first
+        timeout_keep_alive=75,
+        backlog=4096,
         reload=settings.debug,
         log_level=settings.log_level.lower()
     )
@@ -4,23 +4,134 @@ Provides thread-safe database access with proper indexing.
 """
 
 import sqlite3
-import json
 import os
-from datetime import datetime
-from typing import Optional, List, Dict, Any, Generator
+import queue
+import time
+from concurrent.futures import Future
+from datetime import datetime, timedelta, timezone
+from typing import Optional, List, Dict, Any, Generator, Tuple, Literal, Union
 from contextlib import contextmanager
-from threading import Lock
+from operator import itemgetter
+from threading import Event, Lock, Thread
 import logging
 
-from models import RiskLevel, SourceType
+import orjson
+
+from models import RiskLevel, SourceType, ScanStatus
+from settings import settings
 
 logger = logging.getLogger(__name__)
 
+# Enum columns are stored as small integer codes (declaration order, so
+# risk codes also sort by severity) and decoded back to strings on read
+RISK_TO_INT = {level.value: code for code, level in enumerate(RiskLevel)}
+INT_TO_RISK = {code: level for level, code in RISK_TO_INT.items()}
+SOURCE_TO_INT = {source_type.value: code for code, source_type in enumerate(SourceType)}
+INT_TO_SOURCE = {code: source_type for source_type, code in SOURCE_TO_INT.items()}
+STATUS_TO_INT = {status.value: code for code, status in enumerate(ScanStatus)}
+INT_TO_STATUS = {code: status for status, code in STATUS_TO_INT.items()}
+
+# Code stored for values outside an enum (matches no filter, fails API validation)
+_UNKNOWN_CODE = -1
+
+# Timestamps are stored as INTEGER microseconds since the Unix epoch (UTC)
+_EPOCH = datetime(1970, 1, 1)
+_MICROS_PER_DAY = 86_400_000_000
+_MICROS_PER_HOUR = 3_600_000_000
+
+
+def _now_micros() -> int:
+    """Current time as epoch microseconds."""
+    return time.time_ns() // 1000
+
+
+def _to_micros(value: Any) -> int:
+    """Convert a datetime or ISO string (naive means UTC) to epoch microseconds."""
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return (value - _EPOCH) // timedelta(microseconds=1)
+
+
+def _format_micros(micros: Optional[int]) -> Optional[str]:
+    """Render stored epoch microseconds as the naive UTC string the API returns."""
+    if micros is None:
+        return None
+    return (_EPOCH + timedelta(microseconds=micros)).isoformat(sep=" ", timespec="microseconds")
+
+
+def _epoch_micros_sql(expr: str) -> str:
+    """SQL expression converting an SQLite time string to epoch microseconds (ms precision)."""
+    return (
+        f"(CAST(strftime('%s', {expr}) AS INTEGER) * 1000000"
+        f" + CAST(ROUND(strftime('%f', {expr}) * 1000) AS INTEGER) % 1000 * 1000)"
+    )
+
+# Same options the API responses use: numpy scalars and non-string keys are allowed
+_JSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def _dump_details(details: Optional[Dict[str, Any]]) -> Optional[bytes]:
+    """
+    Serialize a details dict for the details column (None when empty).
+    
+    Stored as the UTF-8 JSON BLOB orjson produces, skipping a decode to str
+    on write; orjson.loads reads both these and older TEXT values.
+    """
+    return orjson.dumps(details, option=_JSON_OPTIONS) if details else None
+
+
+def _encode(mapping: Dict[str, int], value: Any, column: str) -> int:
+    """Map an enum string (or an already-encoded int) to its stored code."""
+    if isinstance(value, int):
+        return value
+    try:
+        return mapping[value]
+    except KeyError:
+        raise ValueError(f"Invalid {column}: {value!r}") from None
+
+
+def _filter_code(mapping: Dict[str, int], value: Any) -> int:
+    """Like _encode, but unknown filter values just match nothing."""
+    return value if isinstance(value, int) else mapping.get(value, _UNKNOWN_CODE)
+
+
+def _decode_row(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn a row's stored enum codes back into their string values, in place."""
+    data['risk_level'] = INT_TO_RISK.get(data['risk_level'], data['risk_level'])
+    data['source_type'] = INT_TO_SOURCE.get(data['source_type'], data['source_type'])
+    data['status'] = INT_TO_STATUS.get(data['status'], data['status'])
+    data['timestamp'] = _format_micros(data['timestamp'])
+    return data
+
+
+def _case_sql(column: str, mapping: Dict[str, int]) -> str:
+    """SQL expression mapping a TEXT enum column to its integer code."""
+    whens = " ".join(f"WHEN '{value}' THEN {code}" for value, code in mapping.items())
+    return f"CASE {column} {whens} ELSE {_UNKNOWN_CODE} END"
+
+
+def _parse_details(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Decode a row's details column in place, leaving malformed JSON as stored."""
+    if data.get('details'):
+        try:
+            data['details'] = orjson.loads(data['details'])
+        except orjson.JSONDecodeError:
+            pass
+    return data
+
 
 class ThreatDatabase:
     """
     SQLite database manager for threat logs.
     Implements connection pooling and proper indexing for performance.
+    
+    Writes go through one dedicated writer connection serialized by a lock
+    (SQLite allows a single writer anyway); reads check out one of a small
+    pool of long-lived reader connections, which WAL lets run concurrently.
     """
     
     # Table schema
@@ -28,53 +139,264 @@ class ThreatDatabase:
         CREATE TABLE IF NOT EXISTS threats (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             source TEXT NOT NULL,
-            source_type TEXT NOT NULL,
+            source_type INTEGER NOT NULL,
             probability REAL NOT NULL,
             bytes_scanned INTEGER NOT NULL,
-            risk_level TEXT NOT NULL,
-            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-            details TEXT,
-            blocked BOOLEAN DEFAULT FALSE,
+            risk_level INTEGER NOT NULL,
+            timestamp INTEGER NOT NULL DEFAULT %s,
+            details BLOB,
+            blocked INTEGER DEFAULT 0,
             scan_time_ms REAL DEFAULT 0.0,
-            status TEXT DEFAULT 'THREAT_DETECTED'
+            status INTEGER DEFAULT %d
         )
-    """
+    """ % (_epoch_micros_sql("'now'"), STATUS_TO_INT[ScanStatus.THREAT_DETECTED.value])
     
     # Indexes for common queries
     INDEXES = [
-        "CREATE INDEX IF NOT EXISTS idx_timestamp ON threats(timestamp DESC)",
+        # (timestamp, id) order serves both listing and keyset seeks
+        "CREATE INDEX IF NOT EXISTS idx_timestamp_id ON threats(timestamp DESC, id DESC)",
         "CREATE INDEX IF NOT EXISTS idx_risk_level ON threats(risk_level)",
         "CREATE INDEX IF NOT EXISTS idx_source ON threats(source)",
         "CREATE INDEX IF NOT EXISTS idx_source_type ON threats(source_type)",
         "CREATE INDEX IF NOT EXISTS idx_probability ON threats(probability)",
         "CREATE INDEX IF NOT EXISTS idx_blocked ON threats(blocked)",
+        # Filter + ORDER BY timestamp pagination without a sort step
+        "CREATE INDEX IF NOT EXISTS idx_risk_ts ON threats(risk_level, timestamp DESC, id DESC)",
+        "CREATE INDEX IF NOT EXISTS idx_srctype_ts ON threats(source_type, timestamp DESC, id DESC)",
+        "CREATE INDEX IF NOT EXISTS idx_blocked_ts ON threats(blocked, timestamp DESC, id DESC)",
+        # Covers every column get_threat_stats aggregates (index-only scan)
+        "CREATE INDEX IF NOT EXISTS idx_risk_bytes ON threats"
+        "(risk_level, bytes_scanned, blocked, scan_time_ms, timestamp)",
+    ]
+    
+    # Per-hour, per-risk-level totals kept current by triggers, so the
+    # 24-hour distribution reads at most 24 * 5 summary rows
+    SUMMARY_SCHEMA = """
+        CREATE TABLE IF NOT EXISTS threat_hourly (
+            hour INTEGER NOT NULL,
+            risk_level INTEGER NOT NULL,
+            count INTEGER NOT NULL,
+            sum_prob REAL NOT NULL,
+            sum_bytes INTEGER NOT NULL,
+            PRIMARY KEY (hour, risk_level)
+        ) WITHOUT ROWID
+    """
+    # Trigger bodies that add NEW to / remove OLD from its (hour, risk_level) bucket
+    _SUMMARY_ADD = f"""
+            INSERT INTO threat_hourly VALUES (
+                NEW.timestamp / {_MICROS_PER_HOUR}, NEW.risk_level, 1,
+                NEW.probability, NEW.bytes_scanned
+            )
+            ON CONFLICT (hour, risk_level) DO UPDATE SET
+                count = count + 1,
+                sum_prob = sum_prob + excluded.sum_prob,
+                sum_bytes = sum_bytes + excluded.sum_bytes;
+    """
+    _SUMMARY_REMOVE = f"""
+            UPDATE threat_hourly SET
+                count = count - 1,
+                sum_prob = sum_prob - OLD.probability,
+                sum_bytes = sum_bytes - OLD.bytes_scanned
+            WHERE hour = OLD.timestamp / {_MICROS_PER_HOUR} AND risk_level = OLD.risk_level;
+            DELETE FROM threat_hourly
+            WHERE hour = OLD.timestamp / {_MICROS_PER_HOUR} AND risk_level = OLD.risk_level
+              AND count <= 0;
+    """
+    SUMMARY_TRIGGERS = [
+        "CREATE TRIGGER IF NOT EXISTS trg_threats_hourly_ins AFTER INSERT ON threats "
+        f"BEGIN {_SUMMARY_ADD} END",
+        "CREATE TRIGGER IF NOT EXISTS trg_threats_hourly_del AFTER DELETE ON threats "
+        f"BEGIN {_SUMMARY_REMOVE} END",
+        # Rows aren't edited by this module, but keep the totals right if they are
+        "CREATE TRIGGER IF NOT EXISTS trg_threats_hourly_upd "
+        "AFTER UPDATE OF timestamp, risk_level, probability, bytes_scanned ON threats "
+        f"BEGIN {_SUMMARY_REMOVE} {_SUMMARY_ADD} END",
+    ]
+    SUMMARY_BACKFILL_SQL = f"""
+        INSERT INTO threat_hourly
+        SELECT timestamp / {_MICROS_PER_HOUR}, risk_level, COUNT(*), SUM(probability), SUM(bytes_scanned)
+        FROM threats
+        GROUP BY 1, 2
+    """
+    
+    # Trigger-maintained row count, so get_total_count skips a full COUNT(*) scan
+    COUNTER_SCHEMA = """
+        CREATE TABLE IF NOT EXISTS threats_meta (
+            k TEXT PRIMARY KEY,
+            v INTEGER NOT NULL
+        )
+    """
+    COUNTER_TRIGGERS = [
+        "CREATE TRIGGER IF NOT EXISTS trg_threats_count_ins AFTER INSERT ON threats "
+        "BEGIN UPDATE threats_meta SET v = v + 1 WHERE k = 'count'; END",
+        "CREATE TRIGGER IF NOT EXISTS trg_threats_count_del AFTER DELETE ON threats "
+        "BEGIN UPDATE threats_meta SET v = v - 1 WHERE k = 'count'; END",
+    ]
+    COUNTER_BACKFILL_SQL = """
+        INSERT OR REPLACE INTO threats_meta VALUES ('count', (SELECT COUNT(*) FROM threats))
+    """
+    
+    # Indexes superseded by the ones above, dropped from existing databases
+    OBSOLETE_INDEXES = ["idx_timestamp"]
+    
+    # Pragmas applied to every connection; journal_mode=WAL is persistent
+    # and only needs to be set once when the database is created.
+    CONNECTION_PRAGMAS = [
+        "PRAGMA cache_size=-65536",  # 64MB cache
+        "PRAGMA mmap_size=1073741824",  # 1GB memory-mapped reads (address space, not RAM)
+        "PRAGMA temp_store=MEMORY",  # Sorts and temp tables stay in RAM
+        "PRAGMA busy_timeout=5000",  # Wait for locks instead of failing
     ]
     
-    def __init__(self, db_path: str = "threats.db"):
+    # Commit sync level per durability mode. "fast" never fsyncs on commit
+    # and relies on the periodic checkpoint below instead.
+    SYNCHRONOUS_PRAGMAS = {
+        "strict": "PRAGMA synchronous=NORMAL",
+        "fast": "PRAGMA synchronous=OFF",
+    }
+    
+    # Seconds between synced WAL checkpoints in "fast" durability mode
+    CHECKPOINT_INTERVAL = 30.0
+    
+    # Column order of the rows accepted by log_threats_bulk
+    INSERT_COLUMNS = (
+        "source", "source_type", "probability", "bytes_scanned", "risk_level",
+        "details", "blocked", "scan_time_ms", "status"
+    )
+    # The write time is appended to each row as the timestamp column
+    INSERT_SQL = (
+        f"INSERT INTO threats ({', '.join(INSERT_COLUMNS)}, timestamp) "
+        f"VALUES ({', '.join('?' * (len(INSERT_COLUMNS) + 1))})"
+    )
+    
+    # Columns returned for a threat row, in schema order
+    THREAT_COLUMNS = (
+        "id", "source", "source_type", "probability", "bytes_scanned", "risk_level",
+        "timestamp", "details", "blocked", "scan_time_ms", "status"
+    )
+    # Same without details, usually the widest column, for callers that skip it
+    LIGHT_COLUMNS = tuple(column for column in THREAT_COLUMNS if column != "details")
+    
+    # Listing/counting queries; {where} and {columns} are filled once per
+    # filter combination. id breaks timestamp ties so keyset pages never
+    # skip or repeat rows.
+    COUNT_SQL = "SELECT COUNT(*) FROM threats WHERE {where}"
+    LIST_SQL = (
+        "SELECT {columns} FROM threats "
+        "WHERE {where} ORDER BY timestamp DESC, id DESC LIMIT ? OFFSET ?"
+    )
+    TIME_RANGE_SQL = (
+        "SELECT {columns} FROM threats "
+        "WHERE timestamp BETWEEN ? AND ? ORDER BY timestamp DESC LIMIT ?"
+    )
+    BY_ID_SQL = f"SELECT {', '.join(THREAT_COLUMNS)} FROM threats WHERE id = ?"
+    
+    # Per-level counters reported by get_threat_stats
+    STATS_LEVEL_KEYS = {code: level.lower() for level, code in RISK_TO_INT.items()}
+    
+    # Number of pooled reader connections
+    READER_POOL_SIZE = 4
+    
+    # Most queued log_threat rows committed in one writer-thread transaction
+    WRITE_BATCH_SIZE = 128
+    
+    # Seconds log_threat/flush wait on the writer thread before giving up
+    WRITE_TIMEOUT = 30.0
+    
+    # Most aged-out rows deleted per cleanup_old_threats transaction
+    CLEANUP_BATCH_SIZE = 5000
+    
+    CLEANUP_BATCH_SQL = """
+        DELETE FROM threats WHERE id IN (
+            SELECT id FROM threats WHERE timestamp < ? LIMIT ?
+        )
+    """
+    
+    def __init__(
+        self,
+        db_path: str = "threats.db",
+        durability: Literal["strict", "fast"] = "strict"
+    ):
         """
         Initialize database connection.
         
+        "fast" durability runs with synchronous=OFF, so commits never wait
+        on fsync, and a background thread checkpoints the WAL with a sync
+        every CHECKPOINT_INTERVAL seconds. A process crash loses nothing;
+        an OS crash or power loss can lose the rows committed since the
+        last checkpoint (up to CHECKPOINT_INTERVAL seconds of logs).
+        "strict" (the default) keeps synchronous=NORMAL and SQLite's own
+        checkpointing, so acknowledged logs survive a power loss.
+        
         Args:
             db_path: Path to SQLite database file
+            durability: "strict" or "fast" commit durability
         """
+        if durability not in self.SYNCHRONOUS_PRAGMAS:
+            raise ValueError(f"Unknown durability mode: {durability}")
         self.db_path = db_path
+        self.durability = durability
         self._lock = Lock()
+        self._filter_sql: Dict[Tuple[bool, bool, bool, bool, bool], Tuple[str, str]] = {}
+        self._time_range_sql = {
+            include_details: self.TIME_RANGE_SQL.format(
+                columns=", ".join(self._select_columns(include_details))
+            )
+            for include_details in (False, True)
+        }
+        self._writer = self._connect()
         self._init_database()
-        logger.info(f"ThreatDatabase initialized: {self.db_path}")
+        # Readers are opened after the schema exists so they see it immediately
+        self._readers: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        for _ in range(self.READER_POOL_SIZE):
+            self._readers.put(self._connect())
+        # (row, future) pairs committed by the writer thread; None stops it
+        self._write_queue: "queue.Queue[Optional[Tuple[Optional[tuple], Future]]]" = queue.Queue()
+        self._writer_thread = Thread(target=self._writer_loop, name="threat-db-writer", daemon=True)
+        self._writer_thread.start()
+        self._closing = Event()
+        self._checkpoint_thread: Optional[Thread] = None
+        if durability == "fast":
+            self._checkpoint_thread = Thread(
+                target=self._checkpoint_loop, name="threat-db-checkpoint", daemon=True
+            )
+            self._checkpoint_thread.start()
+        logger.info(f"ThreatDatabase initialized: {self.db_path} ({durability} durability)")
+    
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Open a new connection with the per-connection pragmas applied.
+        
+        Connections are handed between threads by the pool (never used by
+        two threads at once), so the same-thread check is disabled.
+        
+        Returns:
+            sqlite3.Connection: Configured database connection
+        """
+        conn = sqlite3.connect(self.db_path, cached_statements=256, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        for pragma in self.CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        conn.execute(self.SYNCHRONOUS_PRAGMAS[self.durability])
+        return conn
     
     @contextmanager
     def get_connection(self) -> Generator[sqlite3.Connection, None, None]:
         """
-        Get database connection with automatic cleanup.
+        Check out a pooled reader connection, committing on success.
+        
+        Connections are long-lived, so their statement caches stay warm and
+        repeated queries skip re-parsing. Blocks until a reader is free.
         
         Yields:
             sqlite3.Connection: Database connection
+        
+        Raises:
+            RuntimeError: If the database has been closed
         """
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        conn.execute("PRAGMA journal_mode=WAL")  # Write-Ahead Logging for concurrency
-        conn.execute("PRAGMA synchronous=NORMAL")  # Balance durability and speed
-        conn.execute("PRAGMA cache_size=-64000")  # 64MB cache
+        if self._closing.is_set():
+            raise RuntimeError(f"ThreatDatabase {self.db_path} is closed")
+        conn = self._readers.get()
         try:
             yield conn
             conn.commit()
@@ -83,19 +405,249 @@ class ThreatDatabase:
             logger.error(f"Database error: {e}")
             raise
         finally:
-            conn.close()
+            self._readers.put(conn)
+    
+    @contextmanager
+    def get_write_connection(self) -> Generator[sqlite3.Connection, None, None]:
+        """
+        Get the writer connection under the write lock, committing on success.
+        
+        Yields:
+            sqlite3.Connection: Database connection
+        """
+        with self._lock:
+            conn = self._writer
+            try:
+                yield conn
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                logger.error(f"Database error: {e}")
+                raise
+    
+    def _writer_loop(self) -> None:
+        """
+        Commit queued log_threat rows in batches on the writer connection.
+        
+        Whatever has queued up while the previous batch was committing goes
+        into the next transaction, so concurrent scans share one commit
+        instead of paying one each. A lone row is committed immediately.
+        """
+        while True:
+            item = self._write_queue.get()
+            if item is None:
+                return
+            batch = [item]
+            stop = False
+            while len(batch) < self.WRITE_BATCH_SIZE:
+                try:
+                    item = self._write_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            self._commit_batch(batch)
+            if stop:
+                return
+    
+    def _commit_batch(self, batch: List[Tuple[Optional[tuple], Future]]) -> None:
+        """
+        Insert a batch of queued rows in one transaction and resolve their futures.
+        
+        If the batch fails (e.g. one row violates a constraint), it is rolled
+        back and the rows are retried one transaction each, so only the bad
+        row's future gets the exception.
+        """
+        rows = [row for row, _ in batch if row is not None]
+        try:
+            ids: List[int] = []
+            if rows:
+                with self.get_write_connection() as conn:
+                    conn.executemany(self.INSERT_SQL, rows)
+                    # The writer lock keeps the batch's AUTOINCREMENT ids contiguous
+                    last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+                ids = list(range(last_id - len(rows) + 1, last_id + 1))
+        except Exception:
+            for row, future in batch:
+                self._commit_row(row, future)
+            return
+        
+        ids_iter = iter(ids)
+        for row, future in batch:
+            # flush() barriers carry no row and just resolve to None
+            future.set_result(next(ids_iter) if row is not None else None)
+    
+    def _commit_row(self, row: Optional[tuple], future: Future) -> None:
+        """Insert a single queued row in its own transaction and resolve its future."""
+        if row is None:
+            future.set_result(None)
+            return
+        try:
+            with self.get_write_connection() as conn:
+                threat_id = conn.execute(self.INSERT_SQL, row).lastrowid
+        except Exception as e:
+            future.set_exception(e)
+        else:
+            future.set_result(threat_id)
+    
+    def _fail_pending_writes(self) -> None:
+        """Fail any rows still queued after the writer thread has stopped."""
+        while True:
+            try:
+                item = self._write_queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is not None:
+                item[1].set_exception(RuntimeError(f"ThreatDatabase {self.db_path} is closed"))
+    
+    def flush(self) -> None:
+        """
+        Block until every row queued before this call has been committed.
+        
+        Raises:
+            RuntimeError: If the database has been closed
+        """
+        if not self._writer_thread.is_alive():
+            raise RuntimeError(f"ThreatDatabase {self.db_path} is closed")
+        barrier: Future = Future()
+        self._write_queue.put((None, barrier))
+        barrier.result(timeout=self.WRITE_TIMEOUT)
+    
+    def checkpoint(self) -> None:
+        """
+        Checkpoint and truncate the WAL, syncing it and the database file.
+        
+        The writer briefly switches to synchronous=NORMAL so the checkpoint
+        fsyncs even in "fast" mode, making every commit before it durable.
+        """
+        with self.get_write_connection() as conn:
+            conn.execute("PRAGMA synchronous=NORMAL")
+            try:
+                conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+            finally:
+                conn.execute(self.SYNCHRONOUS_PRAGMAS[self.durability])
+    
+    def _checkpoint_loop(self) -> None:
+        """Checkpoint every CHECKPOINT_INTERVAL seconds until close()."""
+        while not self._closing.wait(self.CHECKPOINT_INTERVAL):
+            try:
+                self.checkpoint()
+            except sqlite3.Error:
+                pass  # Logged by get_write_connection; retried next interval
+    
+    def close(self) -> None:
+        """Stop the writer thread, then close the writer and every idle reader connection."""
+        if self._writer_thread.is_alive():
+            self._write_queue.put(None)
+            self._writer_thread.join()
+        # Rows that raced past the is_alive checks would otherwise wait forever
+        self._fail_pending_writes()
+        self._closing.set()
+        if self._checkpoint_thread is not None and self._checkpoint_thread.is_alive():
+            self._checkpoint_thread.join()
+            self.checkpoint()
+        with self._lock:
+            self._writer.close()
+        while True:
+            try:
+                self._readers.get_nowait().close()
+            except queue.Empty:
+                break
     
     def _init_database(self) -> None:
         """Initialize database schema and indexes."""
-        with self.get_connection() as conn:
+        with self.get_write_connection() as conn:
+            # Only take effect on a new file, so they must precede the switch to WAL
+            conn.execute("PRAGMA page_size=8192")
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("PRAGMA journal_mode=WAL")  # Write-Ahead Logging for concurrency
+            migrated = self._migrate_legacy_columns(conn)
             conn.execute(self.SCHEMA)
             for index_sql in self.INDEXES:
                 try:
                     conn.execute(index_sql)
                 except sqlite3.OperationalError:
                     pass  # Index already exists
+            for index_name in self.OBSOLETE_INDEXES:
+                conn.execute(f"DROP INDEX IF EXISTS {index_name}")
+            self._init_summary(conn, rebuild=migrated)
+            self._init_counter(conn, rebuild=migrated)
         logger.info("Database schema initialized")
     
+    def _init_summary(self, conn: sqlite3.Connection, rebuild: bool = False) -> None:
+        """Create the hourly summary table and its triggers, backfilling it when new."""
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'threat_hourly'"
+        ).fetchone()
+        conn.execute(self.SUMMARY_SCHEMA)
+        for trigger_sql in self.SUMMARY_TRIGGERS:
+            conn.execute(trigger_sql)
+        if not exists or rebuild:
+            conn.execute("DELETE FROM threat_hourly")
+            conn.execute(self.SUMMARY_BACKFILL_SQL)
+    
+    def _init_counter(self, conn: sqlite3.Connection, rebuild: bool = False) -> None:
+        """Create the row counter and its triggers, backfilling it when new."""
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'threats_meta'"
+        ).fetchone()
+        conn.execute(self.COUNTER_SCHEMA)
+        for trigger_sql in self.COUNTER_TRIGGERS:
+            conn.execute(trigger_sql)
+        if not exists or rebuild:
+            conn.execute(self.COUNTER_BACKFILL_SQL)
+    
+    def _migrate_legacy_columns(self, conn: sqlite3.Connection) -> bool:
+        """
+        Rebuild a threats table that predates the compact column encodings.
+        
+        Older tables store the enum columns as TEXT and/or timestamp as a
+        DATETIME string; each is converted only if still in its old form.
+        Runs in one transaction, before the indexes are created (the old
+        table's indexes and triggers are dropped along with it).
+        
+        Returns:
+            bool: True if the table was rebuilt
+        """
+        column_types = {row[1]: row[2].upper() for row in conn.execute("PRAGMA table_info(threats)")}
+        if not column_types:
+            return False
+        text_enums = column_types.get("risk_level") == "TEXT"
+        text_timestamp = column_types.get("timestamp") != "INTEGER"
+        if not (text_enums or text_timestamp):
+            return False
+        
+        def enum_expr(column: str, mapping: Dict[str, int]) -> str:
+            return _case_sql(column, mapping) if text_enums else column
+        
+        timestamp_expr = _epoch_micros_sql("timestamp") if text_timestamp else "timestamp"
+        
+        logger.info("Migrating threats table to integer enum/timestamp columns")
+        conn.execute("BEGIN IMMEDIATE")
+        # AUTOINCREMENT high-water mark, which can be above MAX(id) if the newest rows were deleted
+        sequence = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'threats'").fetchone()
+        conn.execute("ALTER TABLE threats RENAME TO threats_old")
+        conn.execute(self.SCHEMA)
+        conn.execute(f"""
+            INSERT INTO threats ({', '.join(self.THREAT_COLUMNS)})
+            SELECT id, source, {enum_expr('source_type', SOURCE_TO_INT)}, probability,
+                   bytes_scanned, {enum_expr('risk_level', RISK_TO_INT)}, {timestamp_expr},
+                   details, blocked, scan_time_ms, {enum_expr('status', STATUS_TO_INT)}
+            FROM threats_old
+        """)
+        conn.execute("DROP TABLE threats_old")
+        if sequence is not None:
+            # Carry it over so new ids never reuse ones handed out before the migration
+            conn.execute("DELETE FROM sqlite_sequence WHERE name = 'threats'")
+            conn.execute(
+                "INSERT INTO sqlite_sequence (name, seq) "
+                "VALUES ('threats', MAX(?, (SELECT COALESCE(MAX(id), 0) FROM threats)))",
+                (sequence[0],)
+            )
+        return True
+    
     def log_threat(
         self,
         source: str,
@@ -111,6 +663,9 @@ class ThreatDatabase:
         """
         Log a detected threat to the database.
         
+        The row is committed by the writer thread, batched with any other
+        rows queued at the same time; this call waits for its ID.
+        
         Args:
             source: URL or filename
             source_type: Type of source (URL/FILE)
@@ -125,23 +680,56 @@ class ThreatDatabase:
         Returns:
             int: ID of inserted row
         """
-        details_json = json.dumps(details) if details else None
+        row = (
+            source, _encode(SOURCE_TO_INT, source_type, "source_type"), probability,
+            bytes_scanned, _encode(RISK_TO_INT, risk_level, "risk_level"),
+            _dump_details(details), blocked, scan_time_ms, _encode(STATUS_TO_INT, status, "status"),
+            _now_micros()
+        )
         
-        with self.get_connection() as conn:
-            cursor = conn.execute("""
-                INSERT INTO threats 
-                (source, source_type, probability, bytes_scanned, risk_level, 
-                 details, blocked, scan_time_ms, status)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                source, source_type, probability, bytes_scanned, risk_level,
-                details_json, blocked, scan_time_ms, status
-            ))
-            
-            threat_id = cursor.lastrowid
-            logger.info(f"Logged threat ID {threat_id}: {source} ({risk_level}, {probability:.2%})")
+        if not self._writer_thread.is_alive():
+            raise RuntimeError(f"ThreatDatabase {self.db_path} is closed")
+        future: Future = Future()
+        self._write_queue.put((row, future))
+        threat_id = future.result(timeout=self.WRITE_TIMEOUT)
+        logger.info(f"Logged threat ID {threat_id}: {source} ({risk_level}, {probability:.2%})")
+        
+        return threat_id
+    
+    def log_threats_bulk(self, rows: List[Tuple]) -> List[int]:
+        """
+        Log many scan results in a single transaction.
+        
+        One commit (and WAL sync) covers the whole batch instead of one per row.
+        
+        Args:
+            rows: Tuples ordered as INSERT_COLUMNS; details may be a dict or None
             
-            return threat_id
+        Returns:
+            List[int]: IDs of the inserted rows, in input order
+        """
+        if not rows:
+            return []
+        
+        now = _now_micros()
+        params = [
+            (
+                source, _encode(SOURCE_TO_INT, source_type, "source_type"), probability,
+                bytes_scanned, _encode(RISK_TO_INT, risk_level, "risk_level"),
+                _dump_details(details) if isinstance(details, dict) else details,
+                blocked, scan_time_ms, _encode(STATUS_TO_INT, status, "status"), now
+            )
+            for (source, source_type, probability, bytes_scanned, risk_level,
+                 details, blocked, scan_time_ms, status) in rows
+        ]
+        
+        with self.get_write_connection() as conn:
+            conn.executemany(self.INSERT_SQL, params)
+            # The writer lock keeps the batch's AUTOINCREMENT ids contiguous
+            last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+        
+        logger.info(f"Logged {len(params)} scan results in one transaction")
+        return list(range(last_id - len(params) + 1, last_id + 1))
     
     def log_clean_scan(
         self,
@@ -179,62 +767,141 @@ class ThreatDatabase:
             status="CLEAN"
         )
     
+    def _select_columns(self, include_details: bool) -> Tuple[str, ...]:
+        """Columns a threat listing selects, with or without details."""
+        return self.THREAT_COLUMNS if include_details else self.LIGHT_COLUMNS
+    
+    def _build_threat_filters(
+        self,
+        risk_level: Optional[str] = None,
+        source_type: Optional[str] = None,
+        blocked: Optional[bool] = None,
+        before: Optional[Tuple[Union[str, datetime], int]] = None,
+        include_details: bool = False
+    ) -> Tuple[Tuple[str, str], List[Any]]:
+        """
+        Build the count and list queries for a set of threat filters.
+        
+        before is a (timestamp, id) keyset cursor: only rows that sort after
+        it in the listing order match. include_details picks the list
+        query's column set.
+        
+        The query text only depends on which filters are set, so both
+        queries are memoized per filter combination (at most 32 variants);
+        identical SQL strings let the connection's statement cache reuse
+        the prepared statements.
+        
+        Returns:
+            Tuple of ((count query, list query), query parameters)
+        """
+        key = (
+            bool(risk_level), bool(source_type), blocked is not None, before is not None,
+            include_details
+        )
+        params: List[Any] = []
+        
+        if risk_level:
+            params.append(_filter_code(RISK_TO_INT, risk_level))
+        
+        if source_type:
+            params.append(_filter_code(SOURCE_TO_INT, source_type))
+        
+        if blocked is not None:
+            params.append(blocked)
+        
+        if before is not None:
+            params.extend((_to_micros(before[0]), before[1]))
+        
+        queries = self._filter_sql.get(key)
+        if queries is None:
+            clauses = ["1=1"]
+            if key[0]:
+                clauses.append("risk_level = ?")
+            if key[1]:
+                clauses.append("source_type = ?")
+            if key[2]:
+                clauses.append("blocked = ?")
+            if key[3]:
+                clauses.append("(timestamp, id) < (?, ?)")
+            where = " AND ".join(clauses)
+            queries = self._filter_sql[key] = (
+                self.COUNT_SQL.format(where=where),
+                self.LIST_SQL.format(
+                    columns=", ".join(self._select_columns(include_details)), where=where
+                ),
+            )
+        
+        return queries, params
+    
+    def count_threats(
+        self,
+        risk_level: Optional[str] = None,
+        source_type: Optional[str] = None,
+        blocked: Optional[bool] = None
+    ) -> int:
+        """
+        Count threat logs matching the given filters.
+        
+        Args:
+            risk_level: Filter by risk level
+            source_type: Filter by source type
+            blocked: Filter by blocked status
+            
+        Returns:
+            Number of matching records
+        """
+        (count_sql, _), params = self._build_threat_filters(risk_level, source_type, blocked)
+        with self.get_connection() as conn:
+            cursor = conn.execute(count_sql, params)
+            return cursor.fetchone()[0]
+    
     def get_recent_threats(
         self,
         limit: int = 100,
         offset: int = 0,
         risk_level: Optional[str] = None,
         source_type: Optional[str] = None,
-        blocked: Optional[bool] = None
+        blocked: Optional[bool] = None,
+        parse_details: bool = True,
+        before: Optional[Tuple[Union[str, datetime], int]] = None,
+        include_details: bool = False
     ) -> List[Dict[str, Any]]:
         """
         Get recent threat logs with optional filtering.
         
+        For deep pages pass the (timestamp, id) of the previous page's last
+        row as before (with offset 0): SQLite seeks straight to it instead
+        of walking and discarding offset rows.
+        
         Args:
             limit: Maximum number of results
             offset: Number of results to skip
             risk_level: Filter by risk level
             source_type: Filter by source type
             blocked: Filter by blocked status
+            parse_details: Decode the details JSON (False leaves the stored JSON bytes)
+            before: Keyset cursor; only return rows older than it
+            include_details: Also select the details column (omitted otherwise)
             
         Returns:
             List of threat dictionaries
         """
-        query = "SELECT * FROM threats WHERE 1=1"
-        params = []
-        
-        if risk_level:
-            query += " AND risk_level = ?"
-            params.append(risk_level)
-        
-        if source_type:
-            query += " AND source_type = ?"
-            params.append(source_type)
-        
-        if blocked is not None:
-            query += " AND blocked = ?"
-            params.append(blocked)
-        
-        query += " ORDER BY timestamp DESC LIMIT ? OFFSET ?"
+        (_, list_sql), params = self._build_threat_filters(
+            risk_level, source_type, blocked, before, include_details
+        )
         params.extend([limit, offset])
         
+        # zip against the fixed column tuple: dict(sqlite3.Row) goes through the
+        # mapping protocol per key and measured ~50% slower
+        columns = self._select_columns(include_details)
         with self.get_connection() as conn:
-            cursor = conn.execute(query, params)
-            columns = [desc[0] for desc in cursor.description]
-            rows = cursor.fetchall()
-            
-            results = []
-            for row in rows:
-                data = dict(zip(columns, row))
-                # Parse details JSON
-                if data.get('details'):
-                    try:
-                        data['details'] = json.loads(data['details'])
-                    except json.JSONDecodeError:
-                        pass
-                results.append(data)
-            
-            return results
+            results = [_decode_row(dict(zip(columns, row))) for row in conn.execute(list_sql, params)]
+        
+        if include_details and parse_details:
+            for data in results:
+                _parse_details(data)
+        
+        return results
     
     def get_threat_by_id(self, threat_id: int) -> Optional[Dict[str, Any]]:
         """
@@ -247,20 +914,11 @@ class ThreatDatabase:
             Threat dictionary or None
         """
         with self.get_connection() as conn:
-            cursor = conn.execute(
-                "SELECT * FROM threats WHERE id = ?",
-                (threat_id,)
-            )
+            cursor = conn.execute(self.BY_ID_SQL, (threat_id,))
             row = cursor.fetchone()
             
             if row:
-                data = dict(row)
-                if data.get('details'):
-                    try:
-                        data['details'] = json.loads(data['details'])
-                    except json.JSONDecodeError:
-                        pass
-                return data
+                return _parse_details(_decode_row(dict(row)))
             return None
     
     def get_threat_stats(self) -> Dict[str, Any]:
@@ -271,29 +929,57 @@ class ThreatDatabase:
             Dictionary with threat statistics
         """
         with self.get_connection() as conn:
-            cursor = conn.execute("""
+            # One row per risk level, pivoted below; GROUP BY walks
+            # idx_risk_bytes instead of evaluating a CASE per level per row
+            rows = conn.execute("""
                 SELECT 
-                    COUNT(*) as total,
-                    SUM(CASE WHEN risk_level = 'CRITICAL' THEN 1 ELSE 0 END) as critical,
-                    SUM(CASE WHEN risk_level = 'HIGH' THEN 1 ELSE 0 END) as high,
-                    SUM(CASE WHEN risk_level = 'MEDIUM' THEN 1 ELSE 0 END) as medium,
-                    SUM(CASE WHEN risk_level = 'LOW' THEN 1 ELSE 0 END) as low,
-                    SUM(CASE WHEN risk_level = 'BENIGN' THEN 1 ELSE 0 END) as benign,
-                    SUM(bytes_scanned) as total_bytes_scanned,
-                    SUM(CASE WHEN blocked = 1 THEN 1 ELSE 0 END) as total_blocked,
-                    AVG(scan_time_ms) as avg_scan_time_ms,
-                    MAX(timestamp) as last_threat_time
+                    risk_level,
+                    COUNT(*) as count,
+                    SUM(bytes_scanned) as bytes_scanned,
+                    SUM(blocked = 1) as blocked,
+                    SUM(scan_time_ms) as scan_time_ms,
+                    COUNT(scan_time_ms) as timed,
+                    MAX(timestamp) as last_time
                 FROM threats
-            """)
-            
-            row = cursor.fetchone()
-            return dict(row) if row else {}
+                GROUP BY risk_level
+            """).fetchall()
+        
+        if not rows:
+            return {
+                "total": 0, "critical": None, "high": None, "medium": None,
+                "low": None, "benign": None, "total_bytes_scanned": None,
+                "total_blocked": None, "avg_scan_time_ms": None, "last_threat_time": None
+            }
+        
+        stats: Dict[str, Any] = {
+            "total": 0, "critical": 0, "high": 0, "medium": 0, "low": 0, "benign": 0,
+            "total_bytes_scanned": 0, "total_blocked": 0
+        }
+        scan_time_total = 0.0
+        timed = 0
+        last_times = []
+        for row in rows:
+            level_key = self.STATS_LEVEL_KEYS.get(row["risk_level"])
+            if level_key:
+                stats[level_key] = row["count"]
+            stats["total"] += row["count"]
+            stats["total_bytes_scanned"] += row["bytes_scanned"] or 0
+            stats["total_blocked"] += row["blocked"] or 0
+            scan_time_total += row["scan_time_ms"] or 0.0
+            timed += row["timed"]
+            if row["last_time"] is not None:
+                last_times.append(row["last_time"])
+        
+        stats["avg_scan_time_ms"] = scan_time_total / timed if timed else None
+        stats["last_threat_time"] = _format_micros(max(last_times)) if last_times else None
+        return stats
     
     def get_threats_by_time_range(
         self,
         start_time: datetime,
         end_time: datetime,
-        limit: int = 1000
+        limit: int = 1000,
+        include_details: bool = False
     ) -> List[Dict[str, Any]]:
         """
         Get threats within a time range.
@@ -302,53 +988,66 @@ class ThreatDatabase:
             start_time: Start of time range
             end_time: End of time range
             limit: Maximum results
+            include_details: Also select and decode the details column
             
         Returns:
             List of threats
         """
+        columns = self._select_columns(include_details)
         with self.get_connection() as conn:
-            cursor = conn.execute("""
-                SELECT * FROM threats
-                WHERE timestamp BETWEEN ? AND ?
-                ORDER BY timestamp DESC
-                LIMIT ?
-            """, (start_time, end_time, limit))
-            
-            columns = [desc[0] for desc in cursor.description]
-            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+            cursor = conn.execute(
+                self._time_range_sql[include_details],
+                (_to_micros(start_time), _to_micros(end_time), limit)
+            )
+            results = [_decode_row(dict(zip(columns, row))) for row in cursor]
+        
+        if include_details:
+            for data in results:
+                _parse_details(data)
+        
+        return results
     
     def get_threat_distribution(self) -> List[Dict[str, Any]]:
         """
         Get threat distribution by risk level over time.
         
+        Reads the trigger-maintained hourly summary: the window is the
+        current hour plus the 23 before it, so its start moves in whole hours.
+        
         Returns:
             List of distribution buckets
         """
+        first_hour = _now_micros() // _MICROS_PER_HOUR - 23
         with self.get_connection() as conn:
             cursor = conn.execute("""
                 SELECT 
                     risk_level,
-                    COUNT(*) as count,
-                    AVG(probability) as avg_probability,
-                    SUM(bytes_scanned) as total_bytes
-                FROM threats
-                WHERE timestamp > datetime('now', '-24 hours')
+                    SUM(count) as count,
+                    SUM(sum_prob) / SUM(count) as avg_probability,
+                    SUM(sum_bytes) as total_bytes
+                FROM threat_hourly
+                WHERE hour >= ?
                 GROUP BY risk_level
-                ORDER BY 
-                    CASE risk_level
-                        WHEN 'CRITICAL' THEN 1
-                        WHEN 'HIGH' THEN 2
-                        WHEN 'MEDIUM' THEN 3
-                        WHEN 'LOW' THEN 4
-                        WHEN 'BENIGN' THEN 5
-                    END
-            """)
-            
-            return [dict(row) for row in cursor.fetchall()]
+                HAVING SUM(count) > 0
+            """, (first_hour,))
+            rows = cursor.fetchall()
+        
+        # At most one row per level; codes ascend with severity, so a
+        # reverse int sort lists CRITICAL first without an SQL ORDER BY
+        rows.sort(key=itemgetter(0), reverse=True)
+        return [
+            {
+                "risk_level": INT_TO_RISK.get(risk_level, risk_level),
+                "count": count,
+                "avg_probability": avg_probability,
+                "total_bytes": total_bytes,
+            }
+            for risk_level, count, avg_probability, total_bytes in rows
+        ]
     
     def calculate_risk_level(self, probability: float) -> str:
         """
-        Calculate risk level from probability.
+        Calculate risk level from probability using the configured settings thresholds.
         
         Args:
             probability: Malware probability (0.0 to 1.0)
@@ -356,87 +1055,116 @@ class ThreatDatabase:
         Returns:
             Risk level string
         """
-        if probability >= 0.9:
-            return "CRITICAL"
-        elif probability >= 0.7:
-            return "HIGH"
-        elif probability >= 0.5:
-            return "MEDIUM"
-        elif probability >= 0.3:
-            return "LOW"
-        else:
-            return "BENIGN"
+        return settings.get_risk_level(probability)
     
     def cleanup_old_threats(self, days: int = 30) -> int:
         """
         Delete threats older than specified days.
         
+        Rows are deleted in batches of CLEANUP_BATCH_SIZE, each in its own
+        transaction, so the write lock and the WAL stay small however much
+        has aged out; freed pages are then handed back to the filesystem
+        with an incremental vacuum instead of a full VACUUM rewrite.
+        
         Args:
             days: Number of days to keep
             
         Returns:
             Number of deleted rows
         """
-        with self.get_connection() as conn:
-            cursor = conn.execute("""
-                DELETE FROM threats
-                WHERE timestamp < datetime('now', ?)
-            """, (f'-{days} days',))
-            
-            deleted = cursor.rowcount
-            if deleted > 0:
-                logger.info(f"Cleaned up {deleted} old threat records")
-            
-            return deleted
+        cutoff = _now_micros() - days * _MICROS_PER_DAY
+        deleted = 0
+        while True:
+            with self.get_write_connection() as conn:
+                cursor = conn.execute(
+                    self.CLEANUP_BATCH_SQL, (cutoff, self.CLEANUP_BATCH_SIZE)
+                )
+            deleted += cursor.rowcount
+            if cursor.rowcount < self.CLEANUP_BATCH_SIZE:
+                break
+        
+        if deleted > 0:
+            with self.get_write_connection() as conn:
+                # executescript steps the pragma to completion; execute() frees one page
+                conn.executescript("PRAGMA incremental_vacuum;")
+            logger.info(f"Cleaned up {deleted} old threat records")
+        
+        return deleted
     
     def get_total_count(self) -> int:
         """
         Get total number of threat records.
         
+        Reads the trigger-maintained counter rather than counting rows.
+        
         Returns:
             Total count
         """
         with self.get_connection() as conn:
-            cursor = conn.execute("SELECT COUNT(*) FROM threats")
+            cursor = conn.execute("SELECT v FROM threats_meta WHERE k = 'count'")
             return cursor.fetchone()[0]
     
     def vacuum(self) -> None:
         """Optimize database file size."""
-        with self.get_connection() as conn:
+        with self.get_write_connection() as conn:
             conn.execute("VACUUM")
         logger.info("Database vacuum completed")
 
 
 # Global database instance
 database: Optional[ThreatDatabase] = None
+_db_lock = Lock()
 
 
-def get_database(db_path: str = "threats.db") -> ThreatDatabase:
+def get_database(
+    db_path: str = "threats.db",
+    durability: Optional[Literal["strict", "fast"]] = None
+) -> ThreatDatabase:
     """
     Get or create database instance.
     
+    An instance replaced because the path or durability changed is closed.
+    
     Args:
         db_path: Database file path
+        durability: "strict" or "fast" commit durability (default: settings.db_durability)
         
     Returns:
         ThreatDatabase instance
     """
     global database
-    if database is None or database.db_path != db_path:
-        database = ThreatDatabase(db_path)
-    return database
+    durability = durability or settings.db_durability
+    db = database
+    if db is None or db.db_path != db_path or db.durability != durability:
+        with _db_lock:
+            # Re-check under the lock so concurrent first calls build one instance
+            db = database
+            if db is None or db.db_path != db_path or db.durability != durability:
+                previous = db
+                database = db = ThreatDatabase(db_path, durability)
+                if previous is not None:
+                    previous.close()
+    return db
 
 
-def init_database(db_path: str = "threats.db") -> ThreatDatabase:
+def init_database(
+    db_path: str = "threats.db",
+    durability: Optional[Literal["strict", "fast"]] = None
+) -> ThreatDatabase:
     """
-    Initialize database with given path.
+    Initialize database with given path, closing any previous instance.
     
     Args:
         db_path: Database file path
+        durability: "strict" or "fast" commit durability (default: settings.db_durability)
         
     Returns:
         Initialized ThreatDatabase
     """
     global database
-    database = ThreatDatabase(db_path)
-    return database
\ No newline at end of file
+    with _db_lock:
+        previous = database
+        database = ThreatDatabase(db_path, durability or settings.db_durability)
+        if previous is not None:
+            previous.close()
+        return database
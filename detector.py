@@ -3,14 +3,18 @@ Core streaming DPI and model inference logic.
 Handles real-time malware detection with streaming byte-level analysis.
 """
 
+import math
 import os
 import sys
 import time
 import logging
 import asyncio
+import queue
+import http.cookiejar
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
 from datetime import datetime, timezone
-from typing import Optional, Dict, Any, List, Tuple, Callable
-from dataclasses import dataclass
+from typing import Optional, Dict, Any, List, Tuple, Callable, AsyncIterator
+from dataclasses import dataclass, field
 import threading
 
 import torch
@@ -18,6 +22,7 @@ import torch.nn as nn
 import torch.nn.functional as F
 import numpy as np
 import requests
+from requests.adapters import HTTPAdapter
 from io import BytesIO
 
 # Add parent directory to path for imports
@@ -59,21 +64,108 @@ class ScanResult:
         }
 
 
+@dataclass
+class StreamScanState:
+    """Rolling-window state for an incremental (chunk-by-chunk) scan."""
+    source: str
+    source_type: str
+    use_early_termination: bool
+    start_time: float = field(default_factory=time.perf_counter)
+    buffer: bytearray = field(default_factory=bytearray)
+    bytes_scanned: int = 0
+    max_probability: float = 0.0
+    last_probability: float = 0.0
+    bytes_since_infer: int = 0
+    # (future, bytes_scanned) of a window submitted but not yet checked
+    pending: Optional[Tuple[Future, int]] = None
+
+
+class BatchInferenceEngine:
+    """
+    Coalesces concurrent single-window inference calls into batched forward passes.
+    
+    Callers block on infer(); a worker thread collects up to max_batch_size pending
+    windows (waiting at most max_wait_ms after the first one) and runs them together.
+    """
+    
+    def __init__(
+        self,
+        run_batch: Callable[[List[bytes]], List[float]],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0
+    ):
+        """
+        Initialize the batching engine.
+        
+        Args:
+            run_batch: Function mapping a list of windows to their probabilities
+            max_batch_size: Maximum windows per forward pass
+            max_wait_ms: How long to wait for more requests after the first arrives
+        """
+        self._run_batch = run_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: "queue.Queue[Tuple[bytes, Future]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._worker, name="batch-inference", daemon=True)
+        self._thread.start()
+    
+    def submit(self, data: bytes) -> Future:
+        """Queue a window for inference and return a future for its probability."""
+        future: Future = Future()
+        self._queue.put((data, future))
+        return future
+    
+    def infer(self, data: bytes) -> float:
+        """Run inference on a window as part of the next batch."""
+        return self.submit(data).result()
+    
+    def _worker(self) -> None:
+        """Collect pending windows and run them as one batch."""
+        while True:
+            items = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(items) < self.max_batch_size:
+                timeout = deadline - time.monotonic()
+                try:
+                    items.append(self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            # Skip windows whose caller gave up (cancelled) while they were queued
+            items = [(data, future) for data, future in items if future.set_running_or_notify_cancel()]
+            if not items:
+                continue
+            
+            try:
+                probabilities = self._run_batch([data for data, _ in items])
+                for (_, future), probability in zip(items, probabilities):
+                    future.set_result(probability)
+            except Exception as e:
+                # Never let one bad batch kill the worker, or every later infer() would hang
+                logger.error(f"Batch inference failed: {e}")
+                for _, future in items:
+                    if not future.done():
+                        future.set_exception(e)
+
+
 class PositionalEncoding(nn.Module):
     """Sinusoidal Positional Encoding."""
     
     def __init__(self, d_model: int, max_len: int = 1500):
         super().__init__()
+        self.max_len = max_len
         pe = torch.zeros(max_len, d_model)
         position = torch.arange(0, max_len, dtype=torch.float).unsqueeze(1)
-        div_term = torch.exp(torch.arange(0, d_model, 2).float() * 
-                           (-torch.log(torch.tensor(10000.0)) / d_model))
+        div_term = torch.exp(torch.arange(0, d_model, 2, dtype=torch.float) * (-math.log(10000.0) / d_model))
         pe[:, 0::2] = torch.sin(position * div_term)
         pe[:, 1::2] = torch.cos(position * div_term)
         pe = pe.unsqueeze(0)
         self.register_buffer('pe', pe)
     
     def forward(self, x: torch.Tensor) -> torch.Tensor:
+        # Detector inputs are always padded to max_len, so the slice is usually skipped
+        if x.size(1) == self.max_len:
+            return x + self.pe
         return x + self.pe[:, :x.size(1)]
 
 
@@ -158,7 +250,10 @@ class PacketTransformer(nn.Module):
         # Transformer encoder
         x = self.transformer_encoder(x, src_key_padding_mask=src_key_padding_mask)
         
-        # Mean pooling
+        # Mean pooling (padded positions zeroed, as the eager nested-tensor fast path
+        # returns them; keeps compiled and eager outputs identical)
+        if src_key_padding_mask is not None:
+            x = x.masked_fill(src_key_padding_mask.unsqueeze(-1), 0.0)
         x = x.mean(dim=1)
         
         # Classifier
@@ -206,6 +301,8 @@ class StreamingDetector:
         # Streaming parameters
         self.chunk_size = settings.chunk_size
         self.window_size = settings.window_size
+        # Re-running the model on every chunk mostly re-reads bytes it already saw
+        self.inference_stride = settings.inference_stride or max(1, self.window_size // 4)
         self.max_file_size = settings.max_file_size
         self.download_timeout = settings.download_timeout
         self.temperature = settings.temperature
@@ -218,8 +315,29 @@ class StreamingDetector:
         
         # Model
         self.model: Optional[PacketTransformer] = None
+        self.compiled_model: Optional[Callable[..., torch.Tensor]] = None  # Set by compile_model()
         self._load_model()
         
+        # Shared HTTP session, so repeated scans of a host reuse pooled TCP/TLS connections.
+        # Scans fetch arbitrary user-supplied URLs concurrently, so no cookie is ever kept
+        # (or replayed to a later scan); the connection pool is the only shared state.
+        self.http_session = requests.Session()
+        self.http_session.headers['User-Agent'] = 'MalwareDetector/1.0'
+        self.http_session.cookies.set_policy(http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+        adapter = HTTPAdapter(pool_maxsize=settings.max_concurrent_scans)
+        self.http_session.mount('http://', adapter)
+        self.http_session.mount('https://', adapter)
+        
+        # Server event loop, so scans running in worker threads can still notify clients
+        self.event_loop: Optional[asyncio.AbstractEventLoop] = None
+        
+        # Concurrent scans share batched forward passes
+        self.batch_engine = BatchInferenceEngine(
+            self.infer_batch,
+            max_batch_size=settings.batch_size,
+            max_wait_ms=settings.batch_max_wait_ms
+        )
+        
         # Statistics
         self._lock = threading.Lock()
         self.stats = {
@@ -299,18 +417,54 @@ class StreamingDetector:
             else:
                 logger.warning(f"Model file not found: {self.model_path}")
             
-            # Move to device and set eval mode
-            self.model.to(self.device)
+            # Move to device, cast to the inference precision and set eval mode
+            self.inference_dtype = self._resolve_inference_dtype()
+            self.model.to(device=self.device, dtype=self.inference_dtype)
             self.model.eval()
+            logger.info(f"Inference precision: {self.inference_dtype}")
             
-            # Count parameters
-            total_params = sum(p.numel() for p in self.model.parameters())
-            logger.info(f"Model ready: {total_params:,} parameters")
+            # Count parameters (before quantization packs the Linear weights away)
+            self.total_parameters = sum(p.numel() for p in self.model.parameters())
+            self.trainable_parameters = sum(p.numel() for p in self.model.parameters() if p.requires_grad)
+            logger.info(f"Model ready: {self.total_parameters:,} parameters")
+            
+            if settings.quantize_int8:
+                self._quantize_model()
             
         except Exception as e:
             logger.error(f"Failed to initialize model: {e}")
             raise
     
+    def _quantize_model(self) -> None:
+        """
+        Swap the model's Linear layers for dynamically quantized INT8 ones.
+        
+        Only applies to fp32 CPU inference; GPUs use the precision setting.
+        Quantized Linear layers don't expose the weight tensors the fused
+        MultiheadAttention fast path inspects, so that path is turned off.
+        """
+        if self.device.type != "cpu" or self.inference_dtype != torch.float32:
+            logger.warning("INT8 quantization needs fp32 CPU inference, skipping")
+            return
+        if not hasattr(torch.backends.mha, "set_fastpath_enabled"):
+            logger.warning("INT8 quantization needs torch>=2.2, skipping")
+            return
+        
+        torch.backends.mha.set_fastpath_enabled(False)
+        self.model = torch.ao.quantization.quantize_dynamic(self.model, {nn.Linear}, dtype=torch.qint8)
+        logger.info("Linear layers dynamically quantized to INT8")
+    
+    def _resolve_inference_dtype(self) -> torch.dtype:
+        """Map settings.precision to a parameter dtype for this device."""
+        precision = settings.precision
+        if precision == "auto":
+            if self.device.type != "cuda":
+                precision = "fp32"
+            else:
+                # BF16 keeps FP32's exponent range, so activations can't overflow
+                precision = "bf16" if torch.cuda.is_bf16_supported() else "fp16"
+        return {"fp32": torch.float32, "fp16": torch.float16, "bf16": torch.bfloat16}[precision]
+    
     def byte_to_token_ids(self, data: bytes) -> List[int]:
         """
         Convert bytes to token IDs (0-255).
@@ -352,12 +506,82 @@ class StreamingDetector:
         Returns:
             Model input tensor [1, seq_len]
         """
-        tokens = self.byte_to_token_ids(data)
-        tokens = self.pad_or_truncate(tokens, self.window_size)
-        tensor = torch.tensor([tokens], dtype=torch.long)
-        return tensor.to(self.device)
+        return self._windows_to_inputs([data])[0]
+    
+    def _windows_to_inputs(self, windows: List[bytes]) -> Tuple[torch.Tensor, torch.Tensor]:
+        """
+        Pack byte windows into a padded [batch, window_size] token tensor and its padding mask.
+        
+        Equivalent to pad_or_truncate(byte_to_token_ids(data)) per window, but
+        the bytes are widened straight into a NumPy array instead of going
+        through a Python int list per byte. The mask comes from the known
+        window lengths rather than comparing every token against the pad id.
+        """
+        tokens = np.full((len(windows), self.window_size), self.model.pad_token_id, dtype=np.int64)
+        lengths = np.empty((len(windows), 1), dtype=np.int64)
+        for i, data in enumerate(windows):
+            length = lengths[i, 0] = min(len(data), self.window_size)
+            tokens[i, :length] = np.frombuffer(data, dtype=np.uint8, count=length)
+        padding_mask = np.arange(self.window_size) >= lengths
+        return torch.from_numpy(tokens).to(self.device), torch.from_numpy(padding_mask).to(self.device)
+    
+    def compile_model(self) -> bool:
+        """
+        Compile the model with torch.compile and warm it up on a full window.
+        
+        Falls back to a frozen TorchScript trace where torch.compile is
+        unavailable (e.g. no Triton/C++ toolchain), and to eager mode if
+        tracing fails too.
+        
+        Returns:
+            True if the compiled model is in use
+        """
+        if self.model is None:
+            return False
+        
+        example = torch.zeros((1, self.window_size), dtype=torch.long, device=self.device)
+        example_mask = self.model.create_padding_mask(example)
+        
+        try:
+            mode = "reduce-overhead" if self.device.type == "cuda" else "default"
+            compiled = torch.compile(self.model, mode=mode)
+            
+            # Trigger compilation now so the first request doesn't pay for it
+            with torch.inference_mode():
+                compiled(example, src_key_padding_mask=example_mask)
+            
+            self.compiled_model = compiled
+            logger.info(f"Model compiled with torch.compile (mode={mode})")
+            return True
+        except Exception as e:
+            logger.warning(f"torch.compile failed, trying TorchScript: {e}")
+        
+        try:
+            # Freezing inlines the weights as constants so the JIT can fold and fuse them
+            with torch.inference_mode():
+                traced = torch.jit.freeze(
+                    torch.jit.trace(self.model, (example, example_mask), strict=False)
+                )
+                traced(example, src_key_padding_mask=example_mask)
+            
+            self.compiled_model = traced
+            logger.info("Model compiled with torch.jit.trace + freeze")
+            return True
+        except Exception as e:
+            logger.warning(f"TorchScript tracing failed, using eager model: {e}")
+            return False
+    
+    def _forward(self, tensor: torch.Tensor, padding_mask: torch.Tensor) -> torch.Tensor:
+        """Run the compiled model when available, falling back to eager mode on failure."""
+        if self.compiled_model is not None:
+            try:
+                return self.compiled_model(tensor, src_key_padding_mask=padding_mask)
+            except Exception as e:
+                logger.warning(f"Compiled model failed, falling back to eager mode: {e}")
+                self.compiled_model = None
+        return self.model(tensor, src_key_padding_mask=padding_mask)
     
-    @torch.no_grad()
+    @torch.inference_mode()
     def infer(self, data: bytes) -> float:
         """
         Run model inference on byte data.
@@ -371,23 +595,45 @@ class StreamingDetector:
         if self.model is None:
             raise RuntimeError("Model not loaded")
         
-        # Preprocess
-        tensor = self.preprocess(data)
-        
-        # Create padding mask
-        padding_mask = self.model.create_padding_mask(tensor)
+        # Preprocess (the padding mask follows from the data length)
+        tensor, padding_mask = self._windows_to_inputs([data])
         
         # Forward pass
-        logits = self.model(tensor, src_key_padding_mask=padding_mask)
+        logits = self._forward(tensor, padding_mask)
         
-        # Apply temperature scaling
-        scaled_logits = logits / self.temperature
+        # Apply temperature scaling (in FP32 to keep the sigmoid calibrated)
+        scaled_logits = logits.float() / self.temperature
         
         # Get probability of malware (class 1)
         probability = torch.sigmoid(scaled_logits[0, 1]).item()
         
         return probability
     
+    @torch.inference_mode()
+    def infer_batch(self, windows: List[bytes]) -> List[float]:
+        """
+        Run model inference on several byte windows in one forward pass.
+        
+        Args:
+            windows: Raw byte windows
+            
+        Returns:
+            Malware probability (0.0 to 1.0) for each window
+        """
+        if self.model is None:
+            raise RuntimeError("Model not loaded")
+        
+        count = len(windows)
+        if self.compiled_model is not None and self.device.type == "cuda":
+            # reduce-overhead mode captures a CUDA graph per input shape and replays
+            # it; rounding the batch up to a power of two keeps that to a few graphs
+            windows = list(windows) + [b"\0"] * ((1 << (count - 1).bit_length()) - count)
+        
+        tensor, padding_mask = self._windows_to_inputs(windows)
+        
+        logits = self._forward(tensor, padding_mask)
+        return torch.sigmoid(logits[:count, 1].float() / self.temperature).tolist()
+    
     def scan_url(
         self,
         url: str,
@@ -407,26 +653,15 @@ class StreamingDetector:
         Returns:
             ScanResult with detection details
         """
-        # Use parameter override or default from settings
-        use_early_termination = (
-            early_termination if early_termination is not None
-            else self.early_termination_enabled
-        )
-        
-        start_time = time.perf_counter()
-        buffer = bytearray()
-        bytes_scanned = 0
-        max_probability = 0.0
-        early_termination_active = False
+        state = self.start_stream_scan(url, "URL", early_termination)
         
-        logger.info(f"Starting URL scan: {url} (early_termination={use_early_termination})")
+        logger.info(f"Starting URL scan: {url} (early_termination={state.use_early_termination})")
         
         try:
-            with requests.get(
+            with self.http_session.get(
                 url,
                 stream=True,
-                timeout=self.download_timeout,
-                headers={'User-Agent': 'MalwareDetector/1.0'}
+                timeout=self.download_timeout
             ) as response:
                 response.raise_for_status()
                 
@@ -434,69 +669,34 @@ class StreamingDetector:
                     if not chunk:
                         break
                     
-                    # Add to buffer (rolling window)
-                    buffer.extend(chunk)
-                    buffer = buffer[-self.window_size:]
-                    bytes_scanned += len(chunk)
-                    
                     # Check size limit
-                    if bytes_scanned > self.max_file_size:
+                    if state.bytes_scanned + len(chunk) > self.max_file_size:
+                        state.bytes_scanned += len(chunk)
                         logger.warning(f"File size exceeded limit, stopping scan")
                         break
                     
-                    # Run inference
-                    probability = self.infer(bytes(buffer))
-                    max_probability = max(max_probability, probability)
+                    # Inference of the previous window overlaps this download
+                    result = self._pipeline_stream_step(state, chunk)
                     
                     # Progress callback
                     if progress_callback:
-                        progress_callback(bytes_scanned, probability)
-                    
-                    # Early termination check (fast block mode)
-                    if use_early_termination and bytes_scanned >= self.early_termination_min_bytes:
-                        if probability >= self.early_termination_threshold:
-                            logger.warning(
-                                f"EARLY TERMINATION: Threat detected at {bytes_scanned} bytes "
-                                f"(confidence: {probability:.4f})"
-                            )
-                            early_termination_active = True
-                            scan_time_ms = (time.perf_counter() - start_time) * 1000
-                            return self._create_blocked_result(
-                                url, "URL", probability, bytes_scanned, scan_time_ms,
-                                details={"early_termination": True}
-                            )
+                        progress_callback(state.bytes_scanned, state.last_probability)
                     
-                    # Standard threshold check
-                    if probability >= self.confidence_threshold:
-                        logger.warning(f"Threat detected mid-download: {probability:.4f}")
-                        
-                        # Log and return blocked result
-                        scan_time_ms = (time.perf_counter() - start_time) * 1000
-                        return self._create_blocked_result(
-                            url, "URL", probability, bytes_scanned, scan_time_ms
-                        )
+                    if result is not None:
+                        return result
                 
-                # Clean scan
-                scan_time_ms = (time.perf_counter() - start_time) * 1000
-                return self._create_clean_result(
-                    url, "URL", max_probability, bytes_scanned, scan_time_ms,
-                    details={"early_termination_attempted": early_termination_active}
-                )
+                result = self._collect_pending(state)
+                if result is not None:
+                    return result
+                return self.finish_stream_scan(state)
                 
         except requests.RequestException as e:
-            scan_time_ms = (time.perf_counter() - start_time) * 1000
             logger.error(f"Download failed: {e}")
-            return ScanResult(
-                source=url,
-                source_type="URL",
-                probability=0.0,
-                risk_level="BENIGN",
-                bytes_scanned=bytes_scanned,
-                blocked=False,
-                scan_time_ms=scan_time_ms,
-                status="ERROR",
-                details={"error": str(e)}
-            )
+            return self._create_error_result(state, str(e))
+        except FutureTimeoutError:
+            error = f"Inference timed out after {self.download_timeout}s"
+            logger.error(f"URL scan failed: {error}")
+            return self._create_error_result(state, error)
     
     def scan_file(
         self,
@@ -517,63 +717,278 @@ class StreamingDetector:
         Returns:
             ScanResult with detection details
         """
+        logger.info(f"Starting file scan: {filename} ({len(file_data)} bytes)")
+        state = self.start_stream_scan(filename, "FILE", early_termination)
+        
+        # The whole file is at hand, so find every point where the chunked scan
+        # would infer up front and run those windows as batches
+        inference_ends = []
+        bytes_since_infer = 0
+        for start in range(0, len(file_data), self.chunk_size):
+            end = min(start + self.chunk_size, len(file_data))
+            bytes_since_infer += end - start
+            if self._needs_inference(state, start, end, bytes_since_infer):
+                inference_ends.append(end)
+                bytes_since_infer = 0
+        if bytes_since_infer:
+            inference_ends.append(len(file_data))
+        
+        batch_size = self.batch_engine.max_batch_size
+        for i in range(0, len(inference_ends), batch_size):
+            batch_ends = inference_ends[i:i + batch_size]
+            probabilities = self.infer_batch(
+                [file_data[max(0, end - self.window_size):end] for end in batch_ends]
+            )
+            # Walk the results in file order so detection stops at the first threat
+            for end, probability in zip(batch_ends, probabilities):
+                result = self._check_probability(state, probability, end)
+                if result is not None:
+                    return result
+        
+        state.bytes_scanned = len(file_data)
+        return self.finish_stream_scan(state)
+    
+    def start_stream_scan(
+        self,
+        source: str,
+        source_type: str = "FILE",
+        early_termination: Optional[bool] = None
+    ) -> StreamScanState:
+        """
+        Begin an incremental scan fed by scan_stream_step.
+        
+        Args:
+            source: URL or filename being scanned
+            source_type: "URL" or "FILE"
+            early_termination: Override early termination setting (None = use default)
+            
+        Returns:
+            Fresh scan state
+        """
         # Use parameter override or default from settings
         use_early_termination = (
             early_termination if early_termination is not None
             else self.early_termination_enabled
         )
+        return StreamScanState(source, source_type, use_early_termination)
+    
+    def scan_stream_step(self, state: StreamScanState, chunk: bytes) -> Optional[ScanResult]:
+        """
+        Add a chunk to the rolling window, running inference once a stride of new bytes has arrived.
+        
+        Args:
+            state: Scan state from start_stream_scan
+            chunk: Next block of bytes
+            
+        Returns:
+            Blocked ScanResult if a threat was detected, otherwise None
+        """
+        # Add to buffer (rolling window)
+        state.buffer.extend(chunk)
+        del state.buffer[:-self.window_size]
+        previous_bytes = state.bytes_scanned
+        state.bytes_scanned += len(chunk)
+        state.bytes_since_infer += len(chunk)
         
-        start_time = time.perf_counter()
-        buffer = bytearray()
-        bytes_scanned = 0
-        max_probability = 0.0
-        early_termination_active = False
+        if not self._needs_inference(state, previous_bytes, state.bytes_scanned, state.bytes_since_infer):
+            return None
         
-        logger.info(f"Starting file scan: {filename} ({len(file_data)} bytes) (early_termination={use_early_termination})")
+        return self._infer_window(state)
+    
+    def _needs_inference(
+        self,
+        state: StreamScanState,
+        previous_bytes: int,
+        bytes_scanned: int,
+        bytes_since_infer: int
+    ) -> bool:
+        """Whether a chunk ending at bytes_scanned should trigger inference."""
+        # The chunk that first allows early termination is always checked
+        reached_min_bytes = (
+            state.use_early_termination
+            and previous_bytes < self.early_termination_min_bytes <= bytes_scanned
+        )
+        return bytes_since_infer >= self.inference_stride or reached_min_bytes
+    
+    def _infer_window(self, state: StreamScanState) -> Optional[ScanResult]:
+        """
+        Run inference on the current window and apply the threshold checks.
         
-        # Process in chunks
-        for i in range(0, len(file_data), self.chunk_size):
-            chunk = file_data[i:i + self.chunk_size]
+        Args:
+            state: Scan state from start_stream_scan
             
-            # Add to buffer (rolling window)
-            buffer.extend(chunk)
-            buffer = buffer[-self.window_size:]
-            bytes_scanned += len(chunk)
+        Returns:
+            Blocked ScanResult if a threat was detected, otherwise None
+        """
+        state.bytes_since_infer = 0
+        return self._check_probability(
+            state, self.batch_engine.infer(bytes(state.buffer)), state.bytes_scanned
+        )
+    
+    def _pipeline_stream_step(self, state: StreamScanState, chunk: bytes) -> Optional[ScanResult]:
+        """
+        Like scan_stream_step, but submit the window without waiting for its result.
+        
+        The window is scored by the batching worker while the caller fetches
+        more data; its result is checked at the next inference point (or by
+        _collect_pending), so detection lags by at most one stride.
+        
+        Args:
+            state: Scan state from start_stream_scan
+            chunk: Next block of bytes
             
-            # Run inference
-            probability = self.infer(bytes(buffer))
-            max_probability = max(max_probability, probability)
+        Returns:
+            Blocked ScanResult if the previously submitted window is a threat, otherwise None
+        """
+        state.buffer.extend(chunk)
+        del state.buffer[:-self.window_size]
+        previous_bytes = state.bytes_scanned
+        state.bytes_scanned += len(chunk)
+        state.bytes_since_infer += len(chunk)
+        
+        if not self._needs_inference(state, previous_bytes, state.bytes_scanned, state.bytes_since_infer):
+            return None
+        
+        result = self._collect_pending(state)
+        if result is None:
+            state.pending = (self.batch_engine.submit(bytes(state.buffer)), state.bytes_scanned)
+            state.bytes_since_infer = 0
+        return result
+    
+    def _collect_pending(self, state: StreamScanState) -> Optional[ScanResult]:
+        """
+        Wait for the window submitted by _pipeline_stream_step, if any, and check it.
+        
+        Args:
+            state: Scan state from start_stream_scan
             
-            # Early termination check (fast block mode)
-            if use_early_termination and bytes_scanned >= self.early_termination_min_bytes:
-                if probability >= self.early_termination_threshold:
-                    logger.warning(
-                        f"EARLY TERMINATION: Threat detected at {bytes_scanned} bytes "
-                        f"(confidence: {probability:.4f})"
-                    )
-                    early_termination_active = True
-                    scan_time_ms = (time.perf_counter() - start_time) * 1000
-                    return self._create_blocked_result(
-                        filename, "FILE", probability, bytes_scanned, scan_time_ms,
-                        details={"early_termination": True}
-                    )
+        Returns:
+            Blocked ScanResult if that window is a threat, otherwise None
             
-            # Standard threshold check
-            if probability >= self.confidence_threshold:
-                logger.warning(f"Threat detected in file: {probability:.4f}")
-                
-                scan_time_ms = (time.perf_counter() - start_time) * 1000
+        Raises:
+            concurrent.futures.TimeoutError: If the result takes longer than download_timeout
+        """
+        if state.pending is None:
+            return None
+        future, bytes_scanned = state.pending
+        state.pending = None
+        try:
+            # Bounded like the download itself, so a stuck inference worker can't hang the scan
+            probability = future.result(timeout=self.download_timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise
+        return self._check_probability(state, probability, bytes_scanned)
+    
+    def _check_probability(
+        self,
+        state: StreamScanState,
+        probability: float,
+        bytes_scanned: int
+    ) -> Optional[ScanResult]:
+        """
+        Record a window's probability and apply the threshold checks.
+        
+        Args:
+            state: Scan state from start_stream_scan
+            probability: Malware probability of the window
+            bytes_scanned: Stream offset the window ends at
+            
+        Returns:
+            Blocked ScanResult if a threat was detected, otherwise None
+        """
+        state.last_probability = probability
+        state.max_probability = max(state.max_probability, probability)
+        
+        # Early termination check (fast block mode)
+        if state.use_early_termination and bytes_scanned >= self.early_termination_min_bytes:
+            if probability >= self.early_termination_threshold:
+                logger.warning(
+                    f"EARLY TERMINATION: Threat detected at {bytes_scanned} bytes "
+                    f"(confidence: {probability:.4f})"
+                )
+                scan_time_ms = (time.perf_counter() - state.start_time) * 1000
                 return self._create_blocked_result(
-                    filename, "FILE", probability, bytes_scanned, scan_time_ms
+                    state.source, state.source_type, probability, bytes_scanned,
+                    scan_time_ms, details={"early_termination": True}
                 )
         
-        # Clean scan
-        scan_time_ms = (time.perf_counter() - start_time) * 1000
+        # Standard threshold check
+        if probability >= self.confidence_threshold:
+            logger.warning(f"Threat detected in {state.source_type.lower()}: {probability:.4f}")
+            
+            scan_time_ms = (time.perf_counter() - state.start_time) * 1000
+            return self._create_blocked_result(
+                state.source, state.source_type, probability, bytes_scanned, scan_time_ms
+            )
+        
+        return None
+    
+    def finish_stream_scan(self, state: StreamScanState) -> ScanResult:
+        """
+        Complete an incremental scan, first inferring over any bytes received since the last inference.
+        
+        Args:
+            state: Scan state from start_stream_scan
+            
+        Returns:
+            Blocked ScanResult if the final window is a threat, otherwise a clean ScanResult
+        """
+        if state.bytes_since_infer:
+            result = self._infer_window(state)
+            if result is not None:
+                return result
+        
+        scan_time_ms = (time.perf_counter() - state.start_time) * 1000
         return self._create_clean_result(
-            filename, "FILE", max_probability, bytes_scanned, scan_time_ms,
-            details={"early_termination_attempted": early_termination_active}
+            state.source, state.source_type, state.max_probability, state.bytes_scanned,
+            scan_time_ms, details={"early_termination_attempted": False}
         )
     
+    async def scan_stream(
+        self,
+        chunks: AsyncIterator[bytes],
+        filename: str = "uploaded_file",
+        block_on_detection: bool = True,
+        early_termination: Optional[bool] = None
+    ) -> ScanResult:
+        """
+        Scan an async byte stream (e.g. an upload) without buffering it.
+        
+        Stops consuming the stream as soon as a threat is detected.
+        
+        Args:
+            chunks: Async iterator of byte chunks
+            filename: Original filename
+            block_on_detection: Block if threat detected
+            early_termination: Override early termination setting (None = use default)
+            
+        Returns:
+            ScanResult with detection details
+        """
+        logger.info(f"Starting stream scan: {filename}")
+        state = self.start_stream_scan(filename, "FILE", early_termination)
+        
+        async for chunk in chunks:
+            # Inference runs in a worker thread so the event loop keeps serving requests
+            result = await asyncio.to_thread(self.scan_stream_step, state, chunk)
+            if result is not None:
+                return result
+        
+        # The final window's inference and the clean-result DB write both block
+        return await asyncio.to_thread(self.finish_stream_scan, state)
+    
+    def _schedule_notification(self, event_type: str, data: dict) -> None:
+        """Schedule a client notification from either the event loop or a worker thread."""
+        try:
+            asyncio.get_running_loop().create_task(self._send_notification(event_type, data))
+            return
+        except RuntimeError:
+            pass  # Not on the event loop thread
+        
+        if self.event_loop is not None and self.event_loop.is_running():
+            asyncio.run_coroutine_threadsafe(self._send_notification(event_type, data), self.event_loop)
+    
     async def _send_notification(self, event_type: str, data: dict):
         """Send notification to connected clients via SSE."""
         try:
@@ -582,6 +997,21 @@ class StreamingDetector:
         except Exception:
             pass  # Notification system may not be initialized
     
+    def _create_error_result(self, state: StreamScanState, error: str) -> ScanResult:
+        """Create an unblocked ERROR result for a scan that could not complete."""
+        scan_time_ms = (time.perf_counter() - state.start_time) * 1000
+        return ScanResult(
+            source=state.source,
+            source_type=state.source_type,
+            probability=0.0,
+            risk_level="BENIGN",
+            bytes_scanned=state.bytes_scanned,
+            blocked=False,
+            scan_time_ms=scan_time_ms,
+            status="ERROR",
+            details={"error": error}
+        )
+    
     def _create_blocked_result(
         self,
         source: str,
@@ -625,12 +1055,7 @@ class StreamingDetector:
         }
         
         # Schedule notification (will be executed if async context is available)
-        try:
-            loop = asyncio.get_event_loop()
-            if loop.is_running():
-                loop.create_task(self._send_notification("threat_detected", notification_data))
-        except RuntimeError:
-            pass  # No event loop
+        self._schedule_notification("threat_detected", notification_data)
         
         # Merge details
         result_details = {"log_id": result.get("threat_id")}
@@ -709,6 +1134,10 @@ class StreamingDetector:
         """Get detector statistics."""
         with self._lock:
             return dict(self.stats)
+    
+    def close(self) -> None:
+        """Close the pooled HTTP connections."""
+        self.http_session.close()
 
 
 # Global detector instance
@@ -310,6 +310,18 @@ class ThreatStats(BaseModel):
     )
 
 
+class ThreatCursor(BaseModel):
+    """Keyset position of the last threat on a page."""
+    before_ts: str = Field(
+        ...,
+        description="Timestamp of the last threat returned"
+    )
+    before_id: int = Field(
+        ...,
+        description="ID of the last threat returned"
+    )
+
+
 class ThreatListResponse(BaseModel):
     """Response for threat list endpoint."""
     threats: List[ThreatLog] = Field(
@@ -328,6 +340,10 @@ class ThreatListResponse(BaseModel):
         ...,
         description="Offset used"
     )
+    next_cursor: Optional[ThreatCursor] = Field(
+        default=None,
+        description="Pass as before_ts/before_id to fetch the next page (null on the last page)"
+    )
 
 
 class ThresholdResponse(BaseModel):
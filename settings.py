@@ -4,11 +4,16 @@ Uses Pydantic BaseSettings for environment variable support.
 """
 
 import os
+from bisect import bisect_right
 from typing import Optional
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
+# Risk level names in ascending order of probability
+RISK_LEVEL_NAMES = ("BENIGN", "LOW", "MEDIUM", "HIGH", "CRITICAL")
+
+
 class Settings(BaseSettings):
     """
     Centralized configuration for the malware detection gateway.
@@ -83,6 +88,11 @@ class Settings(BaseSettings):
         le=4096,
         description="Rolling window size for context"
     )
+    inference_stride: Optional[int] = Field(
+        default=None,
+        ge=1,
+        description="New bytes to accumulate between inferences (None = window_size // 4)"
+    )
     max_file_size: int = Field(
         default=100 * 1024 * 1024,  # 100MB
         description="Maximum file size for scanning (bytes)"
@@ -133,6 +143,19 @@ class Settings(BaseSettings):
         le=0.5,
         description="Dropout rate"
     )
+    compile_model: bool = Field(
+        default=False,
+        description="torch.compile the detector model at startup (recommended on GPU)"
+    )
+    precision: str = Field(
+        default="auto",
+        pattern="^(auto|fp32|fp16|bf16)$",
+        description="Inference precision (auto = bf16 on GPUs that support it, else fp16; fp32 on CPU)"
+    )
+    quantize_int8: bool = Field(
+        default=False,
+        description="Dynamically quantize Linear layers to INT8 for fp32 CPU inference"
+    )
     classifier_dropout: float = Field(
         default=0.5,
         ge=0.0,
@@ -151,6 +174,12 @@ class Settings(BaseSettings):
         default="threats.db",
         description="SQLite database file path"
     )
+    db_durability: str = Field(
+        default="strict",
+        pattern="^(strict|fast)$",
+        description="SQLite commit durability: strict fsyncs the WAL on commit; fast skips it "
+                    "and checkpoints periodically (a power loss can drop recent logs)"
+    )
     
     # =====================================================================
     # Server Settings
@@ -169,6 +198,11 @@ class Settings(BaseSettings):
         default=False,
         description="Enable debug mode"
     )
+    workers: int = Field(
+        default=1,
+        ge=1,
+        description="Uvicorn worker processes (each loads its own model copy)"
+    )
     
     # =====================================================================
     # Logging Settings
@@ -207,6 +241,12 @@ class Settings(BaseSettings):
         le=256,
         description="Batch size for inference"
     )
+    batch_max_wait_ms: float = Field(
+        default=5.0,
+        ge=0.0,
+        le=100.0,
+        description="Max time to wait for concurrent scans to fill an inference batch (ms)"
+    )
     max_concurrent_scans: int = Field(
         default=10,
         ge=1,
@@ -250,10 +290,12 @@ class Settings(BaseSettings):
     
     def get_risk_level(self, probability: float) -> str:
         """Determine risk level from probability."""
-        for level, (low, high) in self.risk_levels.items():
-            if low <= probability < high:
-                return level
-        return "CRITICAL" if probability >= 1.0 else "BENIGN"
+        # Bisect the sorted lower bounds instead of building the risk_levels dict per call
+        boundaries = (
+            self.low_risk_threshold, self.medium_risk_threshold,
+            self.high_risk_threshold, self.critical_threshold
+        )
+        return RISK_LEVEL_NAMES[bisect_right(boundaries, probability)]
     
     # =====================================================================
     # Utility Methods
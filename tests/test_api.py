@@ -4,6 +4,8 @@ Tests API endpoints, request validation, and responses.
 """
 
 import pytest
+import asyncio
+import logging
 import os
 import sys
 from unittest.mock import patch, MagicMock
@@ -206,7 +208,7 @@ class TestFileScanEndpoint:
     def mock_detector(self):
         """Create mock detector."""
         mock = MagicMock()
-        mock.scan_file.return_value = MagicMock(
+        result = MagicMock(
             source="test.exe",
             source_type="FILE",
             probability=0.15,
@@ -217,6 +219,13 @@ class TestFileScanEndpoint:
             status="CLEAN",
             details={"log_id": 2}
         )
+        
+        async def scan_stream(chunks, **kwargs):
+            async for _ in chunks:
+                pass
+            return result
+        
+        mock.scan_stream.side_effect = scan_stream
         return mock
     
     def test_scan_file_success(self, mock_detector):
@@ -275,6 +284,7 @@ class TestThreatEndpoints:
                 "blocked": True
             }
         ]
+        mock.count_threats.return_value = 1
         mock.get_stats.return_value = {
             "session_stats": {},
             "database_stats": {
@@ -394,6 +404,227 @@ class TestThreatEndpoints:
                 assert response.status_code == 404
 
 
+class TestThreatPagination:
+    """Tests for keyset pagination of the threat list."""
+    
+    @pytest.fixture
+    def threat_manager(self, tmp_path):
+        """Create a threat manager over a temporary database with five threats."""
+        from threat_manager import ThreatManager
+        
+        manager = ThreatManager(db_path=str(tmp_path / "threats.db"))
+        # Written in one transaction, so every row shares a timestamp and id breaks the tie
+        manager.database.log_threats_bulk([
+            (f"http://example.com/{i}.exe", "URL", 0.8, 1024, "HIGH", None, True, 5.0, "THREAT_DETECTED")
+            for i in range(1, 6)
+        ])
+        yield manager
+        manager.database.close()
+    
+    def _get(self, threat_manager, params):
+        from app import app
+        
+        with patch('app.get_threat_manager_instance', return_value=threat_manager), \
+             patch('app.get_database_instance', return_value=threat_manager.database):
+            with TestClient(app) as client:
+                return client.get("/threats", params=params)
+    
+    def test_first_page(self, threat_manager):
+        """Test the first page is newest first and has a cursor."""
+        response = self._get(threat_manager, {"limit": 2})
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert [t["id"] for t in data["threats"]] == [5, 4]
+        assert data["total"] == 5
+        assert data["next_cursor"]["before_id"] == 4
+    
+    def test_next_page_from_cursor(self, threat_manager):
+        """Test following next_cursor returns the following rows."""
+        cursor = self._get(threat_manager, {"limit": 2}).json()["next_cursor"]
+        
+        response = self._get(threat_manager, {"limit": 2, **cursor})
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert [t["id"] for t in data["threats"]] == [3, 2]
+        assert data["next_cursor"]["before_id"] == 2
+    
+    def test_end_of_results(self, threat_manager):
+        """Test the last, partial page has no cursor."""
+        cursor = self._get(threat_manager, {"limit": 2}).json()["next_cursor"]
+        cursor = self._get(threat_manager, {"limit": 2, **cursor}).json()["next_cursor"]
+        
+        data = self._get(threat_manager, {"limit": 2, **cursor}).json()
+        
+        assert [t["id"] for t in data["threats"]] == [1]
+        assert data["next_cursor"] is None
+    
+    def test_malformed_cursor(self, threat_manager):
+        """Test a malformed cursor is a client error, not a 500."""
+        response = self._get(threat_manager, {"before_ts": "garbage", "before_id": 5})
+        assert response.status_code == 422
+        
+        # Half a cursor is rejected too
+        response = self._get(threat_manager, {"before_id": 5})
+        assert response.status_code == 422
+
+
+class TestThreatDetails:
+    """Tests for threat details read back through /threats."""
+    
+    @pytest.fixture
+    def threat_manager(self, tmp_path):
+        """Create a threat manager over a temporary database."""
+        from threat_manager import ThreatManager
+        
+        manager = ThreatManager(db_path=str(tmp_path / "threats.db"))
+        yield manager
+        manager.database.close()
+    
+    def _insert_legacy(self, database, details_text):
+        """Insert a row whose details are TEXT, as older versions stored them."""
+        from database import RISK_TO_INT, SOURCE_TO_INT, STATUS_TO_INT, _now_micros
+        
+        with database.get_write_connection() as conn:
+            return conn.execute(database.INSERT_SQL, (
+                "legacy.exe", SOURCE_TO_INT["FILE"], 0.8, 100, RISK_TO_INT["HIGH"],
+                details_text, 1, 1.0, STATUS_TO_INT["THREAT_DETECTED"], _now_micros()
+            )).lastrowid
+    
+    def _threats_by_id(self, threat_manager):
+        from app import app
+        
+        with patch('app.get_threat_manager_instance', return_value=threat_manager), \
+             patch('app.get_database_instance', return_value=threat_manager.database):
+            with TestClient(app) as client:
+                response = client.get("/threats")
+        
+        assert response.status_code == 200
+        return {t["id"]: t for t in response.json()["threats"]}
+    
+    def test_nested_details(self, threat_manager):
+        """Test nested details objects are returned intact."""
+        details = {"chunks": [1, 2], "model": {"name": "v3", "scores": {"max": 0.9}}, "note": None}
+        threat_id = threat_manager.database.log_threat(
+            source="http://example.com/a.exe",
+            source_type="URL",
+            probability=0.9,
+            bytes_scanned=2048,
+            risk_level="CRITICAL",
+            details=details
+        )
+        
+        threats = self._threats_by_id(threat_manager)
+        
+        assert threats[threat_id]["details"] == details
+    
+    def test_legacy_text_details(self, threat_manager):
+        """Test legacy TEXT details, including json.dumps NaN, still give valid JSON."""
+        import json
+        
+        nan_id = self._insert_legacy(threat_manager.database, json.dumps({"score": float("nan"), "n": 1}))
+        text_id = self._insert_legacy(threat_manager.database, json.dumps({"nested": {"a": [1]}}))
+        corrupt_id = self._insert_legacy(threat_manager.database, "{not json")
+        
+        threats = self._threats_by_id(threat_manager)
+        
+        assert threats[nan_id]["details"] == {"score": None, "n": 1}
+        assert threats[text_id]["details"] == {"nested": {"a": [1]}}
+        assert threats[corrupt_id]["details"] is None
+
+
+class TestCompression:
+    """Tests for response compression."""
+    
+    def test_sse_routes_are_not_compressed(self):
+        """Test the GZip wrapper compresses normal responses but not SSE routes."""
+        from starlette.applications import Starlette
+        from starlette.responses import PlainTextResponse
+        from starlette.routing import Route
+        from app import SSEExemptGZipMiddleware
+        
+        body = "data: x\n\n" * 500
+        
+        async def events(request):
+            return PlainTextResponse(body)
+        
+        async def listing(request):
+            return PlainTextResponse(body)
+        
+        inner = Starlette(routes=[Route("/events", events), Route("/listing", listing)])
+        wrapped = SSEExemptGZipMiddleware(inner, exempt_paths=frozenset({"/events"}), minimum_size=1024)
+        
+        with TestClient(wrapped) as client:
+            listing_response = client.get("/listing", headers={"Accept-Encoding": "gzip"})
+            events_response = client.get("/events", headers={"Accept-Encoding": "gzip"})
+        
+        assert listing_response.headers.get("content-encoding") == "gzip"
+        assert "content-encoding" not in events_response.headers
+        assert events_response.text == body
+
+
+class TestLogRateLimit:
+    """Tests for the live log stream's rate limit."""
+    
+    def _record(self, level, message):
+        return logging.LogRecord("test", level, __file__, 1, message, None, None)
+    
+    def _run(self, handler, records, wait):
+        """Feed records to handler on a running loop and return what reaches the intake."""
+        import app
+        
+        async def feed():
+            intake = asyncio.Queue()
+            with patch.object(app, '_log_loop', asyncio.get_running_loop()), \
+                 patch.object(app, '_log_intake', intake):
+                for record in records:
+                    handler.handle(record)
+                await asyncio.sleep(wait)
+            return [intake.get_nowait() for _ in range(intake.qsize())]
+        
+        return asyncio.run(feed())
+    
+    def test_burst_is_limited_and_reported_after_silence(self):
+        """Test excess INFO records are dropped and their count still reported once logging stops."""
+        from app import AppLogHandler
+        
+        handler = AppLogHandler(rate=10)
+        handler.DROP_REPORT_INTERVAL = 0.05
+        records = [self._record(logging.INFO, f"info {i}") for i in range(50)]
+        records.append(self._record(logging.ERROR, "error"))
+        
+        entries = self._run(handler, records, wait=0.2)
+        
+        messages = [entry["message"] for entry in entries]
+        assert sum(message.startswith("info") for message in messages) == 10
+        assert "error" in messages
+        assert messages[-1] == "Live log rate limit: dropped 40 records"
+        assert entries[-1]["level"] == "WARNING"
+    
+    def test_no_summary_without_drops(self):
+        """Test records under the rate pass through with no summary."""
+        from app import AppLogHandler
+        
+        handler = AppLogHandler(rate=100)
+        handler.DROP_REPORT_INTERVAL = 0.05
+        
+        entries = self._run(handler, [self._record(logging.INFO, "info")] * 5, wait=0.1)
+        
+        assert [entry["message"] for entry in entries] == ["info"] * 5
+    
+    def test_take_dropped_resets_count(self):
+        """Test the shutdown path can collect the unreported count."""
+        from app import AppLogHandler
+        
+        handler = AppLogHandler(rate=1)
+        handler.DROP_REPORT_INTERVAL = 60
+        self._run(handler, [self._record(logging.INFO, "info")] * 4, wait=0)
+        
+        assert handler.take_dropped() == 3
+        assert handler.take_dropped() == 0
+
+
 class TestStatsEndpoint:
     """Tests for statistics endpoint."""
     
@@ -0,0 +1,262 @@
+"""
+Unit tests for the SQLite threat database.
+Tests the batched writer thread, flush/close semantics, and migrations.
+"""
+
+import pytest
+import os
+import sys
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _wait_for_queue(db, queued, taken, timeout=5.0):
+    """Wait until the writer queue has received queued rows and handed out taken of them."""
+    deadline = time.monotonic() + timeout
+    # unfinished_tasks counts every put (the writer never calls task_done)
+    while (db._write_queue.unfinished_tasks, db._write_queue.qsize()) != (queued, queued - taken):
+        assert time.monotonic() < deadline, "rows were never queued"
+        time.sleep(0.01)
+
+
+class TestBatchedWriter:
+    """Tests for the log_threat writer thread."""
+
+    @pytest.fixture
+    def db(self, tmp_path):
+        """Create a database in a temporary directory."""
+        from database import ThreatDatabase
+
+        database = ThreatDatabase(str(tmp_path / "threats.db"), durability="strict")
+        yield database
+        database.close()
+
+    def _log(self, db, source):
+        return db.log_threat(
+            source=source,
+            source_type="URL",
+            probability=0.85,
+            bytes_scanned=1024,
+            risk_level="HIGH",
+            details={"index": source},
+            blocked=True
+        )
+
+    def test_concurrent_log_threat(self, db):
+        """Test concurrent log_threat calls each get their own committed row."""
+        sources = [f"http://example.com/{i}" for i in range(50)]
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            ids = list(pool.map(lambda source: self._log(db, source), sources))
+
+        assert len(set(ids)) == len(sources)
+        assert db.get_total_count() == len(sources)
+        for threat_id, source in zip(ids, sources):
+            threat = db.get_threat_by_id(threat_id)
+            assert threat["source"] == source
+            assert threat["details"] == {"index": source}
+
+    def test_bad_row_does_not_fail_batch(self, db):
+        """Test one failing row only fails its own log_threat call."""
+        sources = ["http://example.com/a", None, "http://example.com/b", "http://example.com/c"]
+
+        with ThreadPoolExecutor(max_workers=len(sources) + 1) as pool:
+            with db._lock:
+                # The writer takes this row, then blocks on the lock held here...
+                first = pool.submit(self._log, db, "http://example.com/first")
+                _wait_for_queue(db, queued=1, taken=1)
+                # ...so these all queue up and are committed as the next batch
+                futures = [pool.submit(self._log, db, source) for source in sources]
+                _wait_for_queue(db, queued=1 + len(sources), taken=1)
+
+            first.result()
+            with pytest.raises(sqlite3.IntegrityError):
+                futures[1].result()
+            ids = [futures[i].result() for i in (0, 2, 3)]
+
+        assert len(set(ids)) == 3
+        assert db.get_total_count() == 4
+        assert db.get_threat_by_id(ids[0])["source"] == "http://example.com/a"
+        assert db.get_threat_by_id(ids[2])["source"] == "http://example.com/c"
+
+    def test_flush_waits_for_queued_rows(self, db):
+        """Test flush returns once earlier rows are committed."""
+        self._log(db, "http://example.com/flush")
+        db.flush()
+
+        assert db.get_total_count() == 1
+
+    def test_flush_after_close(self, db):
+        """Test flush raises instead of blocking once the database is closed."""
+        db.close()
+
+        with pytest.raises(RuntimeError):
+            db.flush()
+
+    def test_log_threat_after_close(self, db):
+        """Test log_threat raises once the database is closed."""
+        db.close()
+
+        with pytest.raises(RuntimeError):
+            self._log(db, "http://example.com/closed")
+
+
+class TestDatabaseSingleton:
+    """Tests for the get_database singleton."""
+
+    def test_strict_durability_by_default(self, tmp_path):
+        """Test the shared instance only skips fsync when configured to."""
+        from database import get_database
+        from settings import settings
+
+        db = get_database(str(tmp_path / "threats.db"))
+        try:
+            assert settings.db_durability == "strict"
+            assert db.durability == "strict"
+            assert db._checkpoint_thread is None
+        finally:
+            db.close()
+
+    def test_replaced_instance_is_closed(self, tmp_path):
+        """Test switching paths closes the previous instance and its threads."""
+        from database import get_database
+
+        first = get_database(str(tmp_path / "first.db"))
+        second = get_database(str(tmp_path / "second.db"))
+        try:
+            assert second is not first
+            assert not first._writer_thread.is_alive()
+            with pytest.raises(RuntimeError):
+                first.get_total_count()
+        finally:
+            second.close()
+
+
+class TestLegacyMigration:
+    """Tests for rebuilding a database created with the original schema."""
+
+    LEGACY_SCHEMA = """
+        CREATE TABLE IF NOT EXISTS threats (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            source TEXT NOT NULL,
+            source_type TEXT NOT NULL,
+            probability REAL NOT NULL,
+            bytes_scanned INTEGER NOT NULL,
+            risk_level TEXT NOT NULL,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            details TEXT,
+            blocked BOOLEAN DEFAULT FALSE,
+            scan_time_ms REAL DEFAULT 0.0,
+            status TEXT DEFAULT 'THREAT_DETECTED'
+        )
+    """
+
+    LEGACY_ROWS = [
+        # (source, source_type, probability, bytes, risk_level, timestamp, details, blocked, status)
+        ("http://example.com/a.exe", "URL", 0.95, 1000, "CRITICAL",
+         "2024-01-01 10:00:00", '{"chunks": 2}', 1, "THREAT_DETECTED"),
+        ("b.exe", "FILE", 0.75, 2000, "HIGH", None, None, 1, "THREAT_DETECTED"),
+        ("c.txt", "FILE", 0.1, 3000, "BENIGN", None, '{"note": "clean"}', 0, "CLEAN"),
+        # Deleted below, so the AUTOINCREMENT sequence is ahead of MAX(id)
+        ("http://example.com/d.exe", "URL", 0.8, 4000, "HIGH", None, None, 1, "THREAT_DETECTED"),
+    ]
+
+    @pytest.fixture
+    def legacy_path(self, tmp_path):
+        """Create a database file with the original TEXT/DATETIME schema."""
+        path = str(tmp_path / "legacy.db")
+        conn = sqlite3.connect(path)
+        conn.execute(self.LEGACY_SCHEMA)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_timestamp ON threats(timestamp DESC)")
+        for source, source_type, probability, size, risk, timestamp, details, blocked, status \
+                in self.LEGACY_ROWS:
+            conn.execute(
+                "INSERT INTO threats (source, source_type, probability, bytes_scanned, risk_level, "
+                "timestamp, details, blocked, status) "
+                "VALUES (?, ?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP), ?, ?, ?)",
+                (source, source_type, probability, size, risk, timestamp, details, blocked, status)
+            )
+        conn.execute("DELETE FROM threats WHERE id = 4")
+        conn.commit()
+        conn.close()
+        return path
+
+    @pytest.fixture
+    def db(self, legacy_path):
+        """Open (and so migrate) the legacy database."""
+        from database import ThreatDatabase
+
+        database = ThreatDatabase(legacy_path, durability="strict")
+        yield database
+        database.close()
+
+    def test_rows_survive_migration(self, db):
+        """Test every row keeps its id and values."""
+        threats = db.get_recent_threats(limit=10, include_details=True)
+
+        assert [t["id"] for t in threats] == [3, 2, 1]
+        by_id = {t["id"]: t for t in threats}
+        assert by_id[1]["source"] == "http://example.com/a.exe"
+        assert by_id[1]["source_type"] == "URL"
+        assert by_id[1]["risk_level"] == "CRITICAL"
+        assert by_id[1]["timestamp"] == "2024-01-01 10:00:00.000000"
+        assert by_id[1]["details"] == {"chunks": 2}
+        assert by_id[2]["details"] is None
+        assert by_id[3]["status"] == "CLEAN"
+        assert by_id[3]["details"] == {"note": "clean"}
+
+    def test_filters_and_counts(self, db):
+        """Test filters and counters work on the migrated integer columns."""
+        assert db.get_total_count() == 3
+        assert db.count_threats(risk_level="HIGH") == 1
+        assert db.count_threats(source_type="FILE") == 2
+        assert [t["id"] for t in db.get_recent_threats(source_type="URL")] == [1]
+
+    def test_stats_and_distribution(self, db):
+        """Test the aggregates are rebuilt from the migrated rows."""
+        stats = db.get_threat_stats()
+        assert stats["total"] == 3
+        assert stats["critical"] == 1
+        assert stats["high"] == 1
+        assert stats["benign"] == 1
+        assert stats["total_bytes_scanned"] == 6000
+        assert stats["total_blocked"] == 2
+
+        # Only the two rows written "now" fall in the last 24 hours
+        distribution = {row["risk_level"]: row for row in db.get_threat_distribution()}
+        assert set(distribution) == {"HIGH", "BENIGN"}
+        assert distribution["HIGH"]["count"] == 1
+        assert distribution["BENIGN"]["total_bytes"] == 3000
+
+    def test_ids_keep_increasing(self, db):
+        """Test ids deleted before the migration are not handed out again."""
+        new_id = db.log_threat(
+            source="http://example.com/e.exe",
+            source_type="URL",
+            probability=0.9,
+            bytes_scanned=100,
+            risk_level="CRITICAL"
+        )
+
+        assert new_id == 5
+
+    def test_migration_runs_once(self, db, legacy_path):
+        """Test reopening a migrated database leaves it unchanged."""
+        from database import ThreatDatabase
+
+        db.close()
+        reopened = ThreatDatabase(legacy_path, durability="strict")
+        try:
+            assert reopened.get_total_count() == 3
+            assert reopened.get_threat_by_id(1)["details"] == {"chunks": 2}
+        finally:
+            reopened.close()
+
+
+# Run tests if executed directly
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
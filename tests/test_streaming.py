@@ -7,6 +7,8 @@ import pytest
 import os
 import sys
 import time
+import random
+import threading
 from unittest.mock import patch, MagicMock, Mock
 from io import BytesIO
 
@@ -287,6 +289,113 @@ class TestStreamingURLScanning:
         assert b"".join(chunks) == content
 
 
+class TestPipelinedURLScan:
+    """Tests that the pipelined URL scan matches the batched file scan."""
+    
+    @staticmethod
+    def _fake_infer_batch(windows):
+        """Deterministic stand-in for the model: share of 0xFF bytes in the window."""
+        return [window.count(0xFF) / max(len(window), 1) for window in windows]
+    
+    @pytest.fixture
+    def detector(self):
+        """Create a detector whose model is replaced by _fake_infer_batch."""
+        from detector import StreamingDetector, BatchInferenceEngine
+        
+        detector = StreamingDetector.__new__(StreamingDetector)
+        detector.chunk_size = 512
+        detector.window_size = 1500
+        detector.inference_stride = 375
+        detector.max_file_size = 100 * 1024 * 1024
+        detector.download_timeout = 30
+        detector.confidence_threshold = 0.7
+        detector.early_termination_enabled = True
+        detector.early_termination_threshold = 0.9
+        detector.early_termination_min_bytes = 1024
+        detector.event_loop = None
+        detector.infer_batch = self._fake_infer_batch
+        detector.batch_engine = BatchInferenceEngine(self._fake_infer_batch, max_batch_size=8, max_wait_ms=1)
+        detector._lock = threading.Lock()
+        detector.stats = {
+            "total_scans": 0,
+            "threats_blocked": 0,
+            "total_bytes_scanned": 0,
+            "avg_scan_time_ms": 0.0
+        }
+        detector.http_session = MagicMock()
+        with patch('threat_manager.get_threat_manager'):
+            yield detector
+    
+    def _serve(self, detector, content):
+        """Make the detector's session stream content in the requested chunk size."""
+        response = MagicMock()
+        response.iter_content = lambda chunk_size: [content[i:i + chunk_size]
+                                                    for i in range(0, len(content), chunk_size)]
+        detector.http_session.get.return_value.__enter__.return_value = response
+    
+    def test_url_and_file_scans_agree(self, detector):
+        """Test scan_url reports the same verdict and offset as scan_file."""
+        rng = random.Random(0)
+        for _ in range(40):
+            size = rng.randrange(1, 20000)
+            content = bytearray(rng.randrange(0, 255) for _ in range(size))
+            # Some streams get a malicious-looking run of 0xFF bytes somewhere
+            if rng.random() < 0.7:
+                start = rng.randrange(0, size)
+                run = rng.randrange(1, 3000)
+                content[start:start + run] = b"\xff" * len(content[start:start + run])
+            content = bytes(content)
+            self._serve(detector, content)
+            
+            file_result = detector.scan_file(content, "sample.bin")
+            url_result = detector.scan_url("http://example.com/sample.bin")
+            
+            assert url_result.blocked == file_result.blocked
+            assert url_result.status == file_result.status
+            assert url_result.bytes_scanned == file_result.bytes_scanned
+            assert url_result.probability == pytest.approx(file_result.probability)
+    
+    def test_stuck_inference_times_out(self, detector):
+        """Test a stuck inference worker turns into an ERROR result instead of hanging."""
+        from concurrent.futures import Future
+        
+        detector.download_timeout = 0.05
+        detector.batch_engine = MagicMock()
+        detector.batch_engine.submit.side_effect = lambda data: Future()  # Never resolved
+        self._serve(detector, b"\x00" * 5000)
+        
+        result = detector.scan_url("http://example.com/stuck.bin")
+        
+        assert result.status == "ERROR"
+        assert result.blocked is False
+        assert "timed out" in result.details["error"]
+    
+    def test_timed_out_window_does_not_kill_engine(self, detector):
+        """Test the real engine keeps serving after a queued window is cancelled by a timeout."""
+        from detector import BatchInferenceEngine
+        
+        gate = threading.Event()
+        
+        def slow_infer_batch(windows):
+            gate.wait()
+            return self._fake_infer_batch(windows)
+        
+        engine = BatchInferenceEngine(slow_infer_batch, max_batch_size=1, max_wait_ms=1)
+        detector.batch_engine = engine
+        detector.download_timeout = 0.05
+        self._serve(detector, b"\x00" * 5000)
+        
+        # Occupy the worker so the scan's window waits in the queue until it is cancelled
+        busy = engine.submit(b"\x00" * 1500)
+        result = detector.scan_url("http://example.com/stuck.bin")
+        assert result.status == "ERROR"
+        
+        gate.set()
+        assert busy.result(timeout=5) == 0.0
+        assert engine.submit(b"\xff" * 1500).result(timeout=5) == 1.0
+        assert engine._thread.is_alive()
+
+
 class TestPerformanceMetrics:
     """Tests for performance metrics."""
     
@@ -7,7 +7,7 @@ import json
 import logging
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple, Union
 
 from database import get_database, logger
 from models import RiskLevel, ScanStatus
@@ -23,15 +23,6 @@ class ThreatManager:
     Provides risk assessment and structured alert generation.
     """
     
-    # Risk level thresholds (probability ranges)
-    RISK_LEVELS = {
-        (0.0, 0.3): "BENIGN",
-        (0.3, 0.5): "LOW",
-        (0.5, 0.7): "MEDIUM",
-        (0.7, 0.9): "HIGH",
-        (0.9, 1.0): "CRITICAL"
-    }
-    
     # Alert colors for terminal output
     ALERT_COLORS = {
         "BENIGN": "\033[92m",   # Green
@@ -123,7 +114,7 @@ class ThreatManager:
     
     def calculate_risk_level(self, probability: float) -> str:
         """
-        Calculate risk level from probability.
+        Calculate risk level from probability using the configured settings thresholds.
         
         Args:
             probability: Malware probability (0.0 to 1.0)
@@ -131,10 +122,7 @@ class ThreatManager:
         Returns:
             Risk level string
         """
-        for (low, high), level in self.RISK_LEVELS.items():
-            if low <= probability < high:
-                return level
-        return "CRITICAL" if probability >= 1.0 else "BENIGN"
+        return settings.get_risk_level(probability)
     
     def get_risk_level_enum(self, probability: float) -> RiskLevel:
         """Get risk level as enum."""
@@ -327,7 +315,10 @@ class ThreatManager:
         limit: int = 100,
         offset: int = 0,
         risk_level: Optional[str] = None,
-        source_type: Optional[str] = None
+        source_type: Optional[str] = None,
+        before: Optional[Tuple[Union[str, datetime], int]] = None,
+        include_details: bool = True,
+        parse_details: bool = True
     ) -> List[Dict[str, Any]]:
         """
         Get threat logs.
@@ -337,6 +328,9 @@ class ThreatManager:
             offset: Results to skip
             risk_level: Filter by risk level
             source_type: Filter by source type
+            before: (timestamp, id) keyset cursor from the previous page
+            include_details: Include each threat's details (skipped when False)
+            parse_details: Decode details to dicts (False leaves the stored JSON)
             
         Returns:
             List of threat dictionaries
@@ -345,9 +339,29 @@ class ThreatManager:
             limit=limit,
             offset=offset,
             risk_level=risk_level,
-            source_type=source_type
+            source_type=source_type,
+            before=before,
+            include_details=include_details,
+            parse_details=parse_details
         )
     
+    def count_threats(
+        self,
+        risk_level: Optional[str] = None,
+        source_type: Optional[str] = None
+    ) -> int:
+        """
+        Count threat logs matching the given filters.
+        
+        Args:
+            risk_level: Filter by risk level
+            source_type: Filter by source type
+            
+        Returns:
+            Number of matching threats
+        """
+        return self.database.count_threats(risk_level=risk_level, source_type=source_type)
+    
     def get_stats(self) -> Dict[str, Any]:
         """
         Get threat manager statistics.